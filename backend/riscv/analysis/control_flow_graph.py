@@ -57,3 +57,26 @@ class ControlFlowGraph:
 
     def pred(self, i: int) -> list[int]:
         return self.edges[i][1]
+
+    # Nodes in reverse postorder of a depth-first search from the entry (node 0),
+    # preceded by the nodes it doesn't reach, which are searched from in index order.
+    def reverse_postorder(self) -> list[int]:
+        order = []
+        visited = [False] * len(self.nodes)
+        for root in range(len(self.nodes)):
+            if visited[root]:
+                continue
+            visited[root] = True
+            stack = [(root, iter(self.succ(root)))]
+            while stack:
+                node, it = stack[-1]
+                for v in it:
+                    if not visited[v]:
+                        visited[v] = True
+                        stack.append((v, iter(self.succ(v))))
+                        break
+                else:
+                    stack.pop()
+                    order.append(node)
+        order.reverse()
+        return order
@@ -1,21 +1,71 @@
-from dataclasses import dataclass
+import sys
+from collections import deque
+from functools import cached_property
 
 from .control_flow_graph import ControlFlowGraph
+from ..program import BasicBlock
 from ..reg import Reg
 
 
-@dataclass
+def _decode(mask: int, temps: list[Reg]) -> set[Reg]:
+    "The set of temps whose bits are set in `mask`."
+    res: set[Reg] = set()
+    if not mask:
+        return res
+    # Skip the low zero bits, then visit the rest 64 bits at a time, so that sparse masks are cheap.
+    start = (mask & -mask).bit_length() - 1
+    mask >>= start
+    data = mask.to_bytes((mask.bit_length() + 63) // 64 * 8, sys.byteorder)
+    for i, word in enumerate(memoryview(data).cast("Q")):
+        base = start + 64 * i
+        while word:
+            low = word & -word
+            res.add(temps[base + low.bit_length() - 1])
+            word ^= low
+    return res
+
+
 class BlockLiveness:
-    define: set[Reg]
-    live_use: set[Reg]
-    live_in: set[Reg]
-    live_out: set[Reg]
+    """
+    Liveness of a basic block. The analysis works on bitmasks over a dense numbering of the temps
+    of the function (`temps[i]` is bit i), and the sets are only built when they are first used.
+    """
+
+    def __init__(
+        self, temps: list[Reg], define: int, live_use: int, live_in: int, live_out: int
+    ) -> None:
+        self.temps = temps
+        self.define_mask = define
+        self.live_use_mask = live_use
+        self.live_in_mask = live_in
+        self.live_out_mask = live_out
 
+    @cached_property
+    def define(self) -> set[Reg]:
+        return _decode(self.define_mask, self.temps)
 
-@dataclass
-class BlockInstructionLiveness:
-    live_in_seqs: list[set[Reg]]
-    live_out_seqs: list[set[Reg]]
+    @cached_property
+    def live_use(self) -> set[Reg]:
+        return _decode(self.live_use_mask, self.temps)
+
+    @cached_property
+    def live_in(self) -> set[Reg]:
+        return _decode(self.live_in_mask, self.temps)
+
+    @cached_property
+    def live_out(self) -> set[Reg]:
+        return _decode(self.live_out_mask, self.temps)
+
+    def instr_live_out(self, bb: BasicBlock) -> list[set[Reg]]:
+        "Live-out sets of the instructions of `bb` (the block of this liveness), in order. Computed on demand."
+        live = self.live_out.copy()
+        res: list[set[Reg]] = []
+        for instr in reversed(bb.instrs):
+            res.append(live.copy())
+            live.difference_update(instr.defs())
+            live.update(instr.uses())
+        res.reverse()
+        return res
 
 
 # NOTE: implementation choices
@@ -28,43 +78,69 @@ class LivenessAnalyzer:
         do_instr_level: bool = False,
         attach_props: bool = False,
     ) -> list[BlockLiveness]:
-        res: list[BlockLiveness] = []
+        # Number the temps in order of appearance: temps[i] is the temp of bit i.
+        index: dict[Reg, int] = {}
+        temps: list[Reg] = []
+
+        def mask(regs: set[Reg]) -> int:
+            m = 0
+            for r in regs:
+                i = index.get(r)
+                if i is None:
+                    i = index[r] = len(temps)
+                    temps.append(r)
+                m |= 1 << i
+            return m
+
         # Compute define and live_use first. They will not change during the iterations.
-        for bb in graph:
-            define: set[Reg] = set()
-            live_use: set[Reg] = set()
+        n = len(graph)
+        define = [0] * n
+        live_use = [0] * n
+        for i, bb in enumerate(graph):
+            d: set[Reg] = set()
+            u: set[Reg] = set()
             for instr in bb:
                 # live_use = live_use ∪ (use - def)
-                for u in instr.uses():
-                    if u not in define:
-                        live_use.add(u)
-                define.update(instr.defs())
-
-            # live_in is initialized to live_use
-            res.append(BlockLiveness(define, live_use, live_use.copy(), set()))
-
-        # Iteratively update live_in and live_out
-        changed = True
-        while changed:
-            changed = False
-            for i in range(len(graph)):
-                bl = res[i]
-                for j in graph.succ(i):
-                    bl.live_out.update(res[j].live_in)
+                for r in instr.uses():
+                    if r not in d:
+                        u.add(r)
+                d.update(instr.defs())
+            define[i] = mask(d)
+            live_use[i] = mask(u)
+
+        # Worklist solver. Liveness flows backwards, so blocks are first visited in postorder
+        # (the reverse of the reverse postorder), and a block is visited again when a successor's live_in grows.
+        # live_in is initialized to live_use
+        live_in = live_use.copy()
+        live_out = [0] * n
+        worklist = deque(reversed(graph.reverse_postorder()))
+        queued = [True] * n
+        while worklist:
+            i = worklist.popleft()
+            queued[i] = False
+            out = 0
+            for j in graph.succ(i):
+                out |= live_in[j]
+            live_out[i] = out
 
-                # live_in = live_use ∪ (live_out - def)
-                before = len(bl.live_in)
-                bl.live_in.update(bl.live_out - bl.define)
-                after = len(bl.live_in)
+            # live_in = live_use ∪ (live_out - def)
+            new_in = live_use[i] | (out & ~define[i])
+            if new_in != live_in[i]:
+                live_in[i] = new_in
+                for p in graph.pred(i):
+                    if not queued[p]:
+                        queued[p] = True
+                        worklist.append(p)
 
-                if before != after:
-                    changed = True
+        res = [
+            BlockLiveness(temps, define[i], live_use[i], live_in[i], live_out[i])
+            for i in range(n)
+        ]
 
         if attach_props:
             for i, bb in enumerate(graph):
                 bl = res[i]
-                props = (prop for prop in dir(bl) if not prop.startswith("__"))
-                for prop in props:
+                for prop in ("define", "live_use", "live_in", "live_out"):
                     setattr(bb, prop, getattr(bl, prop))
 
         if not do_instr_level:
@@ -72,10 +148,9 @@ class LivenessAnalyzer:
 
         # Compute live_in & live_out for each instruction
         for i, bb in enumerate(graph):
-            live = res[i].live_out.copy()
-            for instr in reversed(bb):
-                instr.live_out = live.copy()
-                live.difference_update(instr.defs())
+            for instr, live in zip(bb, res[i].instr_live_out(bb)):
+                instr.live_out = live
+                live = live.difference(instr.defs())
                 live.update(instr.uses())
-                instr.live_in = live.copy()
+                instr.live_in = live
         return res
@@ -0,0 +1,36 @@
+from .control_flow_graph import ControlFlowGraph
+
+
+# Loop nesting depth of every node: the number of loops that contain it.
+# A loop is made of a header, i.e. the target of an edge that goes back in reverse postorder,
+# and of the nodes that reach the sources of such edges without going through the header.
+# Only nodes after the header in reverse postorder are counted in, so that irreducible loops stay small.
+def loop_depths(graph: ControlFlowGraph) -> list[int]:
+    order = graph.reverse_postorder()
+    rank = [0] * len(graph)
+    for r, i in enumerate(order):
+        rank[i] = r
+
+    # sources of back edges, by header
+    back_edges: dict[int, list[int]] = {}
+    for u in order:
+        for v in graph.succ(u):
+            if rank[v] <= rank[u]:
+                back_edges.setdefault(v, []).append(u)
+
+    depths = [0] * len(graph)
+    for header, sources in back_edges.items():
+        body = {header}
+        stack = []
+        for u in sources:
+            if u not in body:
+                body.add(u)
+                stack.append(u)
+        while stack:
+            for p in graph.pred(stack.pop()):
+                if p not in body and rank[p] > rank[header]:
+                    body.add(p)
+                    stack.append(p)
+        for i in body:
+            depths[i] += 1
+    return depths
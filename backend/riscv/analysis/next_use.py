@@ -0,0 +1,24 @@
+from bisect import bisect_right
+
+from ..program import BasicBlock
+from ..reg import Reg, is_virt_reg
+
+# next use of a value that is not used again in the block
+NO_NEXT_USE = 1 << 62
+
+
+# Next-use distances in a block, for the eviction of registers (Belady's policy: the value used furthest in the future
+# goes first). The positions of the uses of every virtual register are precomputed, so that a query is a binary search.
+class NextUses:
+    def __init__(self, bb: BasicBlock) -> None:
+        self.positions: dict[Reg, list[int]] = {}
+        for i, instr in enumerate(bb.instrs):
+            for r in instr.uses():
+                if is_virt_reg(r):
+                    self.positions.setdefault(r, []).append(i)
+
+    # The position of the first use of `v` after the instruction at position `i`, or NO_NEXT_USE.
+    def after(self, v: Reg, i: int) -> int:
+        positions = self.positions.get(v, ())
+        k = bisect_right(positions, i)
+        return positions[k] if k < len(positions) else NO_NEXT_USE
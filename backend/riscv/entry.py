@@ -1,10 +1,40 @@
-from .passes.manage import Func2ProgPassConverter
-from .passes.local_reg_alloc import LocalRegAllocator
+from typing import Callable
+
+from .passes.manage import Func2ProgPassConverter, NativeFuncTransformPass
 from .passes.code_gen import AsmCodeEmitter
 from .passes.translate import ProgramTranslator
 
 
-backend_passes = [
-    Func2ProgPassConverter(LocalRegAllocator()),
-    Func2ProgPassConverter(AsmCodeEmitter()),
-]
+# The allocators are imported on first use, so that a compilation only loads the one it runs.
+def _local_reg_allocator() -> NativeFuncTransformPass:
+    from .passes.local_reg_alloc import LocalRegAllocator
+
+    return LocalRegAllocator()
+
+
+def _graph_color_reg_allocator() -> NativeFuncTransformPass:
+    from .passes.color_reg_alloc import GraphColorRegAllocator
+
+    return GraphColorRegAllocator()
+
+
+def _linear_scan_reg_allocator() -> NativeFuncTransformPass:
+    from .passes.linear_scan_reg_alloc import LinearScanRegAllocator
+
+    return LinearScanRegAllocator()
+
+
+# register allocators, by the name of `--regalloc`. Each entry creates a new allocator.
+REG_ALLOCATORS: dict[str, Callable[[], NativeFuncTransformPass]] = {
+    "local": _local_reg_allocator,
+    "color": _graph_color_reg_allocator,
+    "linear": _linear_scan_reg_allocator,
+}
+
+
+# Passes keep per-function state, so every compilation gets its own instances.
+def backend_passes(regalloc: str = "local"):
+    return [
+        Func2ProgPassConverter(REG_ALLOCATORS[regalloc]()),
+        Func2ProgPassConverter(AsmCodeEmitter()),
+    ]
@@ -34,14 +34,17 @@ class CmpBranchOp(Enum):
 
 # Native instructions.
 class NativeInstr(TACInstr):
-    ...
+    __slots__ = ()
 
 
 class NativeTerminator(NativeInstr):
-    ...
+    __slots__ = ()
 
 
 class LoadImm32(NativeInstr):
+    __slots__ = ("dst", "value")
+    operand_fields = ("dst",)
+
     def __init__(self, dst: Reg, value: int):
         super().__init__([dst], [])
         self.dst = dst
@@ -52,6 +55,9 @@ class LoadImm32(NativeInstr):
 
 
 class Move(NativeInstr):
+    __slots__ = ("dst", "src")
+    operand_fields = ("dst", "src")
+
     def __init__(self, dst: Reg, src: Reg):
         super().__init__([dst], [src])
         self.dst = dst
@@ -62,6 +68,9 @@ class Move(NativeInstr):
 
 
 class Unary(NativeInstr):
+    __slots__ = ("op", "dst", "src")
+    operand_fields = ("dst", "src")
+
     def __init__(self, op: UnaryOp, dst: Reg, src: Reg):
         super().__init__([dst], [src])
         self.op = str(op)[8:].lower()
@@ -73,6 +82,9 @@ class Unary(NativeInstr):
 
 
 class Binary(NativeInstr):
+    __slots__ = ("op", "dst", "src1", "src2")
+    operand_fields = ("dst", "src1", "src2")
+
     def __init__(self, op: BinaryOp, dst: Reg, src1: Reg, src2: Reg):
         super().__init__([dst], [src1, src2])
         self.op = str(op)[9:].lower()
@@ -85,6 +97,9 @@ class Binary(NativeInstr):
 
 
 class AddI(NativeInstr):
+    __slots__ = ("dst", "src", "imm")
+    operand_fields = ("dst", "src")
+
     def __init__(self, dst: Reg, src: Reg, imm: int):
         super().__init__([dst], [src])
         self.dst = dst
@@ -101,6 +116,9 @@ class AddI(NativeInstr):
 # =>   beq a0, zero, .L1
 #      j .L2
 class RegBranch(NativeTerminator):
+    __slots__ = ("cond", "false_target", "true_target")
+    operand_fields = ("cond",)
+
     def __init__(self, cond: Reg, false_target: BasicBlock, true_target: BasicBlock):
         super().__init__([], [cond])
         self.cond = cond
@@ -109,11 +127,16 @@ class RegBranch(NativeTerminator):
 
     def __str__(self) -> str:
         return "br %s, %s, %s" % (
-            reg_name(self.cond, self.false_target.label, self.true_target.label)
+            reg_name(self.cond),
+            self.false_target.label,
+            self.true_target.label,
         )
 
 
 class CmpBranch(NativeTerminator):
+    __slots__ = ("op", "src1", "src2", "target")
+    operand_fields = ("src1", "src2")
+
     def __init__(self, op: CmpBranchOp, target: BasicBlock, src1: Reg, src2: Reg):
         super().__init__([], [src1, src2])
         self.op = str(op)[11:].lower()
@@ -131,6 +154,8 @@ class CmpBranch(NativeTerminator):
 
 
 class Jump(NativeTerminator):
+    __slots__ = ("target",)
+
     def __init__(self, target: BasicBlock):
         super().__init__([], [])
         self.target = target
@@ -140,6 +165,8 @@ class Jump(NativeTerminator):
 
 
 class NativeRet(NativeTerminator):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__([], [])
 
@@ -148,6 +175,9 @@ class NativeRet(NativeTerminator):
 
 
 class Load(NativeInstr):
+    __slots__ = ("dst", "base", "offset")
+    operand_fields = ("dst", "base")
+
     def __init__(self, dst: Reg, base: Reg, offset: int = 0):
         super().__init__([dst], [base])
         self.dst = dst
@@ -159,6 +189,9 @@ class Load(NativeInstr):
 
 
 class Store(NativeInstr):
+    __slots__ = ("src", "base", "offset")
+    operand_fields = ("src", "base")
+
     def __init__(self, src: Reg, base: Reg, offset: int = 0):
         super().__init__([], [src, base])
         self.src = src
@@ -170,6 +203,9 @@ class Store(NativeInstr):
 
 
 class LoadStackAddr(NativeInstr):
+    __slots__ = ("dst", "base", "offset")
+    operand_fields = ("dst",)
+
     def __init__(self, dst: Reg, base: StackObject, offset: int = 0):
         super().__init__([dst], [])
         self.dst = dst
@@ -185,6 +221,9 @@ class LoadStackAddr(NativeInstr):
 
 
 class StackLoad(NativeInstr):
+    __slots__ = ("dst", "base", "offset")
+    operand_fields = ("dst",)
+
     def __init__(self, dst: Reg, base: StackObject, offset: int = 0):
         super().__init__([dst], [])
         self.dst = dst
@@ -200,6 +239,9 @@ class StackLoad(NativeInstr):
 
 
 class StackStore(NativeInstr):
+    __slots__ = ("src", "base", "offset")
+    operand_fields = ("src",)
+
     def __init__(self, src: Reg, base: StackObject, offset: int = 0):
         super().__init__([], [src])
         self.src = src
@@ -216,6 +258,9 @@ class StackStore(NativeInstr):
 
 # NOTE: sp is not in defs/uses list
 class SPAdd(NativeInstr):
+    __slots__ = ("delta", "src")
+    operand_fields = ("src",)
+
     def __init__(self, delta: int, src: Reg | None = None):
         if src is None:
             super().__init__([], [])
@@ -1,8 +1,23 @@
+import sys
+from typing import Optional, TextIO
+
 from .program import NativeProg
 
 
 class AsmCodePrinter:
-    def print(self, prog: NativeProg):
-        print("    .text")
-        print("    .global main\n")
-        print(str(prog))
+    # Write the program function by function, so that the text of the whole program is never built in memory.
+    def print(self, prog: NativeProg, file: Optional[TextIO] = None):
+        file = file or sys.stdout
+        self.print_header(file)
+        for func in prog.funcs:
+            func.write(file)
+
+    # Print the assembly of functions that has been generated separately.
+    def print_funcs(self, funcs: list[str], file: Optional[TextIO] = None):
+        file = file or sys.stdout
+        self.print_header(file)
+        file.writelines(func + "\n" for func in funcs)
+
+    def print_header(self, file: TextIO):
+        file.write("    .text\n")
+        file.write("    .global main\n\n")
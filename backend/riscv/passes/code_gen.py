@@ -103,8 +103,13 @@ class AsmCodeEmitter(NativeFuncTransformPass):
 
                     case StackStore(src=src, base=base):
                         offset = instr.offset + base.offset - sp_offset
-                        assert is_imm12(offset)
-                        emit(Store(src, GPRegs.SP, offset))
+                        if is_imm12(offset):
+                            emit(Store(src, GPRegs.SP, offset))
+                        else:
+                            # src must survive, so the address goes in the register no allocator uses
+                            emit(LoadImm32(SCRATCH, offset))
+                            emit(Binary(BinaryOp.ADD, SCRATCH, GPRegs.SP, SCRATCH))
+                            emit(Store(src, SCRATCH))
 
                     case SPAdd(delta=delta):
                         sp_offset += delta
@@ -0,0 +1,286 @@
+from .manage import NativeFuncTransformPass
+
+from ..program import BasicBlock, NativeFunc, new_instr_buffer
+from ..instructions import *
+from ..reg import *
+
+from ..analysis.control_flow_graph import ControlFlowGraph
+from ..analysis.liveness import LivenessAnalyzer
+from ..analysis.loops import loop_depths
+
+from .linear_scan_reg_alloc import LinearScanRegAllocator
+
+from utils.tac import instructions as tacinstr
+
+import heapq
+from collections import deque
+from typing import Optional
+
+# colors: SCRATCH is never allocated
+REGS = tuple(r for r in GPRegs.ALLOCATABLE if r is not SCRATCH)
+K = len(REGS)
+
+# spill costs are weighted by 10^(loop depth), up to this depth
+MAX_LOOP_WEIGHT_DEPTH = 8
+
+# Every round costs time in proportion to the interferences, which grow quadratically with the values live across
+# blocks. A graph with more than MAX_INTERFERENCES interferences, and more than K per definition on average (so that
+# it will spill a lot), isn't colored. Neither are graphs that still spill after MAX_ROUNDS rounds.
+# These functions are handed to `LinearScanRegAllocator` instead.
+MAX_INTERFERENCES = 250_000
+MAX_ROUNDS = 4
+
+
+# Interference graph of the virtual registers of a function.
+class InterferenceGraph:
+    def __init__(self) -> None:
+        # neighbors of every node
+        self.adj: dict[Reg, set[Reg]] = {}
+        # estimated cost of spilling every node: its uses and definitions, weighted by loop depth
+        self.cost: dict[Reg, float] = {}
+        # (dst, src) of every move between virtual registers
+        self.moves: list[tuple[Reg, Reg]] = []
+        # coalesced node => the node it was merged into
+        self.alias: dict[Reg, Reg] = {}
+
+    def add_node(self, v: Reg) -> None:
+        if v not in self.adj:
+            self.adj[v] = set()
+            self.cost[v] = 0
+
+    def add_edge(self, u: Reg, v: Reg) -> None:
+        self.adj[u].add(v)
+        self.adj[v].add(u)
+
+    def find(self, v: Reg) -> Reg:
+        alias = self.alias
+        while v in alias:
+            v = alias[v]
+        return v
+
+    # Merge node `b` into node `a`.
+    def merge(self, a: Reg, b: Reg) -> None:
+        adj = self.adj
+        for n in adj.pop(b):
+            adj[n].discard(b)
+            adj[n].add(a)
+            adj[a].add(n)
+        self.cost[a] += self.cost.pop(b)
+        self.alias[b] = a
+
+
+def is_move(instr: TACInstr) -> bool:
+    return isinstance(instr, (Move, tacinstr.Assign))
+
+
+# Global register allocation by graph coloring (Chaitin-Briggs), for a whole function at a time:
+#   1. build: an interference graph of the virtual registers, from liveness
+#   2. coalesce: merge the operands of moves, unless that could make the graph uncolorable (Briggs' test)
+#   3. simplify: remove nodes with fewer than K neighbors, or else the cheapest spill candidate, onto a stack
+#   4. select: pop the nodes and give each a register that its neighbors don't have (optimistic coloring)
+#   5. spill: if some nodes got no register, load them before their uses, store them after their definitions,
+#       and start over
+# Functions whose interference graphs are too large, or that still spill after `MAX_ROUNDS` rounds, are finished by
+# the linear scan allocator, which takes the spill code of the rounds so far as it is.
+class GraphColorRegAllocator(NativeFuncTransformPass):
+    def __init__(self):
+        # stack objects with a linear order
+        self.stack_objects: deque[StackObject] = deque()
+        # stack slots mapping: vreg => stack object
+        self.stack_slots: dict[Reg, StackObject] = {}
+        # temps of spill code, which must not be spilled again
+        self.no_spill: set[Reg] = set()
+
+    def __call__(self, fn: NativeFunc) -> NativeFunc:
+        self.stack_objects = deque()
+        self.stack_slots = {}
+        self.no_spill = set()
+        self.fn = fn
+
+        # `new_temp` must not return a register that is already used
+        fn.temp_used = max(
+            [fn.temp_used]
+            + [r.index for bb in fn.blocks for instr in bb for r in instr.operands()]
+        )
+
+        cfg = ControlFlowGraph(fn.blocks)
+        # spill code doesn't change the control flow, so loop depths are computed once
+        depths = loop_depths(cfg)
+
+        for _ in range(MAX_ROUNDS):
+            graph = self.build(cfg, depths)
+            if graph is None:
+                break
+            self.coalesce(graph)
+            colors, spilled = self.color(graph)
+            if not spilled:
+                self.assign(cfg, graph, colors)
+                # attach stack objects information
+                fn.stack_objects = self.stack_objects
+                return fn
+            self.spill(cfg, graph, spilled)
+
+        fn = LinearScanRegAllocator()(fn)
+        # the slots of the spill code so far come first
+        fn.stack_objects = self.stack_objects + fn.stack_objects
+        return fn
+
+    # The interference graph of the function, or None if it is too large and dense to be colored.
+    def build(
+        self, cfg: ControlFlowGraph, depths: list[int]
+    ) -> Optional[InterferenceGraph]:
+        graph = InterferenceGraph()
+        bbls = LivenessAnalyzer()(cfg)
+        interferences = definitions = 0
+        for bb, bl, depth in zip(cfg, bbls, depths):
+            weight = 10 ** min(depth, MAX_LOOP_WEIGHT_DEPTH)
+            for instr, live_out in zip(bb.instrs, bl.instr_live_out(bb)):
+                defs = [r for r in instr.defs() if is_virt_reg(r)]
+                uses = [r for r in instr.uses() if is_virt_reg(r)]
+                for r in defs + uses:
+                    graph.add_node(r)
+                    graph.cost[r] += weight
+
+                # A definition interferes with everything live after it,
+                # except with the source of a move, which may share its register.
+                src = uses[0] if is_move(instr) and defs and uses else None
+                if src is not None:
+                    graph.moves.append((defs[0], src))
+                definitions += len(defs)
+                for d in defs:
+                    interferences += len(live_out)
+                    for r in live_out:
+                        if r is not d and r is not src and is_virt_reg(r):
+                            graph.add_node(r)
+                            graph.add_edge(d, r)
+            if interferences > MAX_INTERFERENCES and interferences > K * definitions:
+                return None
+        return graph
+
+    # Conservative coalescing: operands of a move are merged if they don't interfere,
+    # and the merged node has fewer than K neighbors of significant degree (>= K), so it can still be simplified.
+    def coalesce(self, graph: InterferenceGraph) -> None:
+        adj = graph.adj
+        for dst, src in graph.moves:
+            a, b = graph.find(dst), graph.find(src)
+            if a is b or b in adj[a] or a in self.no_spill or b in self.no_spill:
+                continue
+            significant = sum(1 for n in adj[a] | adj[b] if len(adj[n]) >= K)
+            if significant < K:
+                graph.merge(a, b)
+
+    # Simplify and select. Returns the register of every node, and the nodes that must be spilled.
+    def color(self, graph: InterferenceGraph) -> tuple[dict[Reg, Reg], list[Reg]]:
+        adj, cost = graph.adj, graph.cost
+        degree = {v: len(adj[v]) for v in adj}
+        no_spill = self.no_spill
+
+        def spill_priority(v: Reg) -> float:
+            return float("inf") if v in no_spill else cost[v] / degree[v]
+
+        low = [v for v in adj if degree[v] < K]
+        # Spill candidates. Priorities only grow as degrees drop, so stale entries are updated when they are popped.
+        candidates = [(spill_priority(v), v.index, v) for v in adj if degree[v] >= K]
+        heapq.heapify(candidates)
+
+        stack: list[Reg] = []
+        removed: set[Reg] = set()
+
+        def remove(v: Reg) -> None:
+            stack.append(v)
+            removed.add(v)
+            for n in adj[v]:
+                if n not in removed:
+                    degree[n] -= 1
+                    if degree[n] == K - 1:
+                        low.append(n)
+
+        while len(stack) < len(adj):
+            if low:
+                v = low.pop()
+                if v not in removed:
+                    remove(v)
+                continue
+
+            # Every node left has K neighbors or more. Remove the cheapest one anyway:
+            # its neighbors may still end up with fewer than K colors.
+            while True:
+                priority, _, v = heapq.heappop(candidates)
+                if v in removed:
+                    continue
+                if priority < spill_priority(v):
+                    heapq.heappush(candidates, (spill_priority(v), v.index, v))
+                    continue
+                break
+            remove(v)
+
+        colors: dict[Reg, Reg] = {}
+        spilled: list[Reg] = []
+        for v in reversed(stack):
+            taken = {colors[n] for n in adj[v] if n in colors}
+            for p in REGS:
+                if p not in taken:
+                    colors[v] = p
+                    break
+            else:
+                spilled.append(v)
+        return colors, spilled
+
+    def get_stack_slot(self, vreg: Reg) -> StackObject:
+        if vreg not in self.stack_slots:
+            # the position (offset) for this stack object is not determined yet
+            stack_obj = StackObject(None, WORD_SIZE)
+            self.stack_objects.append(stack_obj)
+            self.stack_slots[vreg] = stack_obj
+        return self.stack_slots[vreg]
+
+    # Rewrite every use and definition of a spilled node (and of the nodes coalesced into it)
+    # into a load into, or a store from, a new temp.
+    def spill(
+        self, cfg: ControlFlowGraph, graph: InterferenceGraph, spilled: list[Reg]
+    ) -> None:
+        spilled_set = set(spilled)
+        slots: dict[Reg, StackObject] = {}
+        for v in graph.adj.keys() | graph.alias.keys():
+            rep = graph.find(v)
+            if rep in spilled_set:
+                slots[v] = self.get_stack_slot(rep)
+
+        new_temp = self.fn.new_temp
+        for bb in cfg:
+            buf, emit = new_instr_buffer()
+            for instr in bb:
+                mapping: dict[Reg, Reg] = {}
+                for v in instr.uses():
+                    if v in slots and v not in mapping:
+                        mapping[v] = t = new_temp()
+                        self.no_spill.add(t)
+                        emit(StackLoad(t, slots[v]))
+                stores = []
+                for v in instr.defs():
+                    if v in slots:
+                        if v not in mapping:
+                            mapping[v] = new_temp()
+                            self.no_spill.add(mapping[v])
+                        stores.append((mapping[v], slots[v]))
+
+                if mapping:
+                    instr.rewrite_operands(mapping)
+                emit(instr)
+                for t, slot in stores:
+                    emit(StackStore(t, slot))
+            bb.instrs = buf
+
+    # Replace virtual registers by their colors, and drop the moves that became no-ops.
+    def assign(
+        self, cfg: ControlFlowGraph, graph: InterferenceGraph, colors: dict[Reg, Reg]
+    ) -> None:
+        mapping = {v: colors[graph.find(v)] for v in graph.adj.keys() | graph.alias.keys()}
+        for bb in cfg:
+            buf, emit = new_instr_buffer()
+            for instr in bb:
+                instr.rewrite_operands(mapping)
+                if is_move(instr) and instr.dsts[0] is instr.srcs[0]:
+                    continue
+                emit(instr)
+            bb.instrs = buf
@@ -0,0 +1,250 @@
+from .manage import NativeFuncTransformPass
+
+from ..program import BasicBlock, NativeFunc, new_instr_buffer
+from ..instructions import *
+from ..reg import *
+
+from ..analysis.control_flow_graph import ControlFlowGraph
+from ..analysis.liveness import LivenessAnalyzer, BlockLiveness
+from ..analysis.next_use import NextUses
+
+from utils.tac import instructions as tacinstr
+
+from collections import deque
+from typing import Container
+
+# SCRATCH is never allocated. Here it also breaks cycles of moves between blocks.
+REGS = tuple(r for r in GPRegs.ALLOCATABLE if r is not SCRATCH)
+
+
+def is_move(instr: TACInstr) -> bool:
+    return isinstance(instr, (Move, tacinstr.Assign))
+
+
+# Registers at a point of the code: the virtual register that every physical register holds,
+# and which of them are dirty, i.e. not saved in their stack slots. Values that are not in registers are in their slots.
+class RegState:
+    def __init__(self) -> None:
+        self.phys2virt: dict[Reg, Reg] = {}
+        self.virt2phys: dict[Reg, Reg] = {}
+        self.dirty: set[Reg] = set()
+
+    def bind(self, v: Reg, p: Reg) -> None:
+        self.phys2virt[p] = v
+        self.virt2phys[v] = p
+
+    def unbind(self, v: Reg) -> Reg:
+        p = self.virt2phys.pop(v)
+        del self.phys2virt[p]
+        self.dirty.discard(v)
+        return p
+
+    # A copy with only the values in `keep`.
+    def restrict(self, keep: Container[Reg]) -> "RegState":
+        state = RegState()
+        for p, v in self.phys2virt.items():
+            if v in keep:
+                state.bind(v, p)
+                if v in self.dirty:
+                    state.dirty.add(v)
+        return state
+
+
+# Linear-scan register allocation with second-chance binpacking (Traub, Holloway and Smith):
+#   1. The blocks are scanned once, in layout order. Every block starts with the registers of the end of the
+#       previous one, minus the values that are not live into it.
+#   2. A value gets a register at its first use or definition in a block, and gives it back at the end of its
+#       lifetime, or of a lifetime segment (a hole in its interval), which is where it stops being live.
+#   3. When no register is free, the value whose next use is the furthest is evicted (stored if it is dirty).
+#       Its interval is split there: it gets a register again at its next use, possibly another one.
+#   4. Finally, on every edge of the CFG, moves, loads and stores reconcile the registers at the end of the source
+#       with the registers at the start of the target. They go at the end of a source with a single successor,
+#       at the start of a target with a single predecessor, or else in a new block on the edge.
+class LinearScanRegAllocator(NativeFuncTransformPass):
+    def __init__(self):
+        # stack objects with a linear order
+        self.stack_objects: deque[StackObject] = deque()
+        # stack slots mapping: vreg => stack object
+        self.stack_slots: dict[Reg, StackObject] = {}
+
+    def get_stack_slot(self, vreg: Reg) -> StackObject:
+        if vreg not in self.stack_slots:
+            # the position (offset) for this stack object is not determined yet
+            stack_obj = StackObject(None, WORD_SIZE)
+            self.stack_objects.append(stack_obj)
+            self.stack_slots[vreg] = stack_obj
+        return self.stack_slots[vreg]
+
+    def __call__(self, fn: NativeFunc) -> NativeFunc:
+        self.stack_objects = deque()
+        self.stack_slots = {}
+
+        cfg = ControlFlowGraph(fn.blocks)
+        bbls = LivenessAnalyzer()(cfg)
+
+        starts: list[RegState] = []
+        ends: list[RegState] = []
+        state = RegState()
+        for bb, bl in zip(cfg, bbls):
+            state = state.restrict(bl.live_in)
+            starts.append(state.restrict(bl.live_in))
+            self.scan(bb, bl, state)
+            ends.append(state)
+
+        self.resolve(fn, cfg, bbls, starts, ends)
+
+        # attach stack objects information
+        fn.stack_objects = self.stack_objects
+        return fn
+
+    def scan(self, bb: BasicBlock, bl: BlockLiveness, state: RegState) -> None:
+        instrs = bb.instrs
+        n = len(instrs)
+
+        # the operands that stop being live at every instruction
+        dying: list[list[Reg]] = [[]] * n
+        live = bl.live_out.copy()
+        for i in range(n - 1, -1, -1):
+            instr = instrs[i]
+            dead = [r for r in instr.operands() if r not in live and is_virt_reg(r)]
+            if dead:
+                dying[i] = dead
+            live.difference_update(instr.defs())
+            live.update(instr.uses())
+        next_uses = NextUses(bb)
+
+        phys2virt, virt2phys, dirty = state.phys2virt, state.virt2phys, state.dirty
+        buf, emit = new_instr_buffer()
+
+        def alloc(i: int, protected: list[Reg], preferred: Reg | None = None) -> Reg:
+            if preferred is not None and preferred not in phys2virt:
+                return preferred
+            for p in REGS:
+                if p not in phys2virt:
+                    return p
+            # No free register: evict the value used furthest in the future, preferably a clean one.
+            victim = max(
+                (v for v in virt2phys if v not in protected),
+                key=lambda v: (next_uses.after(v, i), v not in dirty),
+            )
+            was_dirty = victim in dirty
+            p = state.unbind(victim)
+            if was_dirty:
+                emit(StackStore(p, self.get_stack_slot(victim)))
+            return p
+
+        for i, instr in enumerate(instrs):
+            uses = [r for r in instr.uses() if is_virt_reg(r)]
+            defs = [r for r in instr.defs() if is_virt_reg(r)]
+            protected = uses + defs
+
+            mapping: dict[Reg, Reg] = {}
+            for v in uses:
+                if v not in virt2phys:
+                    p = alloc(i, protected)
+                    emit(StackLoad(p, self.get_stack_slot(v)))
+                    state.bind(v, p)
+                mapping[v] = virt2phys[v]
+
+            # Registers of operands that die here can be reused by the definitions.
+            dead = dying[i]
+            for v in dead:
+                if v in virt2phys and v not in defs:
+                    state.unbind(v)
+
+            for v in defs:
+                if v not in virt2phys:
+                    # the destination of a move gets the register of its source if it is free, to drop the move
+                    preferred = mapping.get(uses[0]) if is_move(instr) and uses else None
+                    state.bind(v, alloc(i, protected, preferred))
+                dirty.add(v)
+                mapping[v] = virt2phys[v]
+
+            instr.rewrite_operands(mapping)
+            if not (is_move(instr) and instr.dsts[0] is instr.srcs[0]):
+                emit(instr)
+
+            for v in dead:
+                if v in virt2phys and v in defs:
+                    state.unbind(v)
+
+        bb.instrs = buf
+
+    def resolve(
+        self,
+        fn: NativeFunc,
+        cfg: ControlFlowGraph,
+        bbls: list[BlockLiveness],
+        starts: list[RegState],
+        ends: list[RegState],
+    ) -> None:
+        num_edge_blocks = 0
+        labels = {bb.label for bb in cfg}
+        # (new blocks are appended to `fn.blocks`, which is also the node list of `cfg`)
+        for u in range(len(cfg)):
+            succs = cfg.succ(u)
+            for v in dict.fromkeys(succs):
+                code = self.edge_code(bbls[v].live_in, ends[u], starts[v])
+                if not code:
+                    continue
+
+                src, dst = cfg[u], cfg[v]
+                if len(succs) == 1:
+                    # before the jump
+                    src.instrs[-1:-1] = code
+                elif len(cfg.pred(v)) == 1 and v != 0:
+                    # (the entry block has another predecessor: the caller)
+                    dst.instrs[0:0] = code
+                else:
+                    num_edge_blocks += 1
+                    label = ".L%s.edge%d" % (fn.name, num_edge_blocks)
+                    assert label not in labels
+                    edge = BasicBlock(label)
+                    edge.instrs = code + [Jump(dst)]
+                    fn.blocks.append(edge)
+                    term = src.terminator()
+                    assert isinstance(term, RegBranch)
+                    if term.false_target is dst:
+                        term.false_target = edge
+                    if term.true_target is dst:
+                        term.true_target = edge
+
+    # The code that turns the registers `end` into the registers `start`, for the values in `live`.
+    def edge_code(
+        self, live: set[Reg], end: RegState, start: RegState
+    ) -> list[TACInstr]:
+        code: list[TACInstr] = []
+        # destination register => (source register, value)
+        moves: dict[Reg, tuple[Reg, Reg]] = {}
+        loads: list[tuple[Reg, Reg]] = []
+        for v in live:
+            src = end.virt2phys.get(v)
+            dst = start.virt2phys.get(v)
+            # The stack slot must be up to date unless the value stays dirty in a register.
+            if src is not None and v in end.dirty and (dst is None or v not in start.dirty):
+                code.append(StackStore(src, self.get_stack_slot(v)))
+            if dst is not None:
+                if src is None:
+                    loads.append((dst, v))
+                elif src is not dst:
+                    moves[dst] = (src, v)
+
+        # Parallel moves: a move is done once no other move reads its destination.
+        # A cycle is broken by copying one of its registers to the scratch register, which is free between blocks.
+        while moves:
+            sources = {src for src, _ in moves.values()}
+            ready = [dst for dst in moves if dst not in sources]
+            if ready:
+                for dst in ready:
+                    src, _ = moves.pop(dst)
+                    code.append(Move(dst, src))
+            else:
+                blocked = next(iter(moves))
+                code.append(Move(SCRATCH, blocked))
+                for dst, (src, v) in moves.items():
+                    if src is blocked:
+                        moves[dst] = (SCRATCH, v)
+
+        for dst, v in loads:
+            code.append(StackLoad(dst, self.get_stack_slot(v)))
+        return code
@@ -6,10 +6,14 @@ from ..reg import *
 
 from ..analysis.control_flow_graph import ControlFlowGraph
 from ..analysis.liveness import LivenessAnalyzer, BlockLiveness
+from ..analysis.next_use import NextUses
+
+from utils.tac import instructions as tacinstr
 
-import random
 from collections import deque
 
+REGS = tuple(r for r in GPRegs.ALLOCATABLE if r is not SCRATCH)
+
 
 class LocalRegAllocator(NativeFuncTransformPass):
     def __init__(self):
@@ -26,31 +30,17 @@ class LocalRegAllocator(NativeFuncTransformPass):
             self.stack_slots[vreg] = stack_obj
         return self.stack_slots[vreg]
 
-    # Allocate physical registers for each function (subroutine)
+    # Allocate physical registers for each function (subroutine), in a single pass over its blocks
     def __call__(self, fn: NativeFunc) -> NativeFunc:
         self.stack_objects = deque()
         self.stack_slots = {}
-        self.fn = fn
 
         cfg = ControlFlowGraph(fn.blocks)
-        anaylzer = LivenessAnalyzer()
-
-        while True:
-            bbls = anaylzer(cfg, do_instr_level=True)
+        bbls = LivenessAnalyzer()(cfg)
 
-            # TODO: consider stack objects of function parameters
-            for i, bb in enumerate(cfg):
-                self.do_local_alloc(bb, bbls[i], i == 0)
-
-            done = all(self.check_and_expand_stack_ops(bb) for bb in cfg)
-            if done:
-                break
-
-        # replace virtual registers
-        for bb in cfg:
-            for instr in bb:
-                for vreg, preg in instr.reg_map:
-                    instr.replace_operand(vreg, preg)
+        # TODO: consider stack objects of function parameters
+        for i, bb in enumerate(cfg):
+            self.do_local_alloc(bb, bbls[i], i == 0)
 
         # attach stack objects information
         fn.stack_objects = self.stack_objects
@@ -60,9 +50,14 @@ class LocalRegAllocator(NativeFuncTransformPass):
         # currently allocated physical register <=> virtual register bindings
         phys2virt: dict[Reg, Reg] = {}
         virt2phys: dict[Reg, Reg] = {}
+        # bound virtual registers whose stack slots hold their values, i.e. that were loaded and not redefined since
+        clean: set[Reg] = set()
+        next_uses = NextUses(bb)
 
         def unbind(p: Reg):
-            virt2phys.pop(phys2virt.pop(p))
+            v = phys2virt.pop(p)
+            virt2phys.pop(v)
+            clean.discard(v)
 
         def bind(v: Reg, p: Reg):
             phys2virt[p] = v
@@ -72,7 +67,7 @@ class LocalRegAllocator(NativeFuncTransformPass):
             return [r for r in regs if is_virt_reg(r)]
 
         buf, emit = new_instr_buffer()
-        for instr in bb:
+        for i, (instr, live_out) in enumerate(zip(bb.instrs, bl.instr_live_out(bb))):
             instr.reg_map: list[tuple[Reg, Reg]] = []
 
             # 2 phases here: allocate for source operands and then destination operands
@@ -85,65 +80,55 @@ class LocalRegAllocator(NativeFuncTransformPass):
                     if v in virt2phys:
                         # virtual register v already have a corresponding physical register
                         pregs.append(virt2phys[v])
+                        if not need_load[stage]:
+                            clean.discard(v)
                         continue
 
                     # TODO: preferred regs first?
                     free_reg_found = False
-                    for p in GPRegs.ALLOCATABLE:
-                        if p in phys2virt and phys2virt[p] not in instr.live_out:
+                    for p in REGS:
+                        if p in phys2virt and phys2virt[p] in vregs[stage]:
+                            # taken by another operand of this stage, even if its value dies here
+                            continue
+                        if p in phys2virt and phys2virt[p] not in live_out:
                             unbind(p)
                         if p not in phys2virt:
                             # physical register p is available
                             free_reg_found = True
                             break
                     if not free_reg_found:
-                        # no free physical register left. find a victim and evict it.
-                        candidates = tuple(set(GPRegs.ALLOCATABLE) - set(pregs))
-                        p = random.choice(candidates)
+                        # No free physical register left. Evict the value used furthest in the future (Belady),
+                        # preferably one whose stack slot is up to date, which needs no store.
+                        p = max(
+                            (p for p in REGS if phys2virt[p] not in vregs[stage]),
+                            key=lambda p: (next_uses.after(phys2virt[p], i), phys2virt[p] in clean),
+                        )
                         victim = phys2virt[p]
-                        emit(StackStore(p, self.get_stack_slot(victim)))
+                        if victim not in clean:
+                            emit(StackStore(p, self.get_stack_slot(victim)))
                         unbind(p)
 
                     bind(v, p)
                     pregs.append(p)
                     if need_load[stage]:
                         emit(StackLoad(p, self.get_stack_slot(v)))
+                        clean.add(v)
 
-                # replacement is done later. just record mapping here.
-                # NOTE: 1. one iteration may not be sufficient to complete register allocation
-                # 2. global vreg => preg mapping is not used as SSA property is not guaranteed
+                # NOTE: global vreg => preg mapping is not used as SSA property is not guaranteed
                 instr.reg_map += list(zip(vregs[stage], pregs))
 
+            # Blocks are allocated once, so virtual registers are replaced right away.
+            if instr.reg_map:
+                instr.rewrite_operands(dict(instr.reg_map))
             emit(instr)
 
-        # We have to spill all active regs in live_out set onto stack
+        # We have to spill all active regs in live_out set onto stack, unless their slots are up to date.
+        # The stores go before the terminator, if any.
+        term = buf.pop() if buf and isinstance(buf[-1], (NativeTerminator, tacinstr.Terminator)) else None
         for v in bl.live_out:
-            if v in virt2phys:
+            if v in virt2phys and v not in clean:
                 emit(StackStore(virt2phys[v], self.get_stack_slot(v)))
+        if term is not None:
+            emit(term)
 
         bb.instrs = buf
-
-    def check_and_expand_stack_ops(self, bb: BasicBlock) -> bool:
-        ok = True
-        buf, emit = new_instr_buffer()
-        # NOTE: all stack stores are conservatively transformed into LoadStackAddr + Store
-
-        for instr in bb:
-            match instr:
-                case StackStore(src=src, base=base, offset=offset):
-                    ok = False
-                    addr = self.fn.new_temp()
-                    emit(LoadStackAddr(addr, base, offset))
-                    emit(Store(src, addr))
-
-                case SPAdd(delta=delta, src=src) if not is_imm12(delta) and src is None:
-                    ok = False
-                    tmp = self.fn.new_temp()
-                    emit(LoadImm32(tmp, delta))
-                    emit(SPAdd(delta, tmp))
-
-                case _:
-                    emit(instr)
-
-        bb.instrs = buf
-        return ok
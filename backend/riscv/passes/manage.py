@@ -2,6 +2,8 @@ from ..program import NativeFunc, NativeProg
 
 from abc import ABC, abstractmethod
 
+from utils.timer import NULL_TIMER, PassTimer
+
 
 class NativeFuncTransformPass(ABC):
     @abstractmethod
@@ -19,7 +21,12 @@ class Func2ProgPassConverter(NativeProgTransformPass):
     def __init__(self, fn_transform):
         self.fn_transform = fn_transform
 
-    def __call__(self, prog: NativeProg):
+    @property
+    def name(self) -> str:
+        return type(self.fn_transform).__name__
+
+    def __call__(self, prog: NativeProg, timer: PassTimer = NULL_TIMER):
         for i, fn in enumerate(prog.funcs):
-            prog.funcs[i] = self.fn_transform(fn)
+            with timer.time(fn.name):
+                prog.funcs[i] = self.fn_transform(fn)
         return prog
@@ -19,7 +19,7 @@ class StackObject:
 def assign_stack_offsets(objs: Iterable[StackObject]) -> int:
     offset = 0
     for obj in objs:
-        obj.base = offset
+        obj.offset = offset
         offset += obj.size
     return offset
 
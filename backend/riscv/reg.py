@@ -9,6 +9,7 @@ def is_virt_reg(r: Reg) -> bool:
     return r.index > 0
 
 
+# Temps are interned, so this returns the same register as `GPRegs` does, without allocating.
 def phys_reg(id: int) -> Reg:
     return Reg(-id)
 
@@ -59,6 +60,10 @@ class GPRegs:  # General Purpose Registers
     MAX_SAVED_COUNT = 13  # ra, s0~s11
 
 
+# Never allocated: AsmCodeEmitter addresses the stack slots that are out of the reach of imm12 through it.
+SCRATCH = GPRegs.T6
+
+
 GPR_NAMES = (
     "x0",
     "ra",
@@ -0,0 +1,138 @@
+"""
+Batch compilation of many input files, selected by passing several files or a directory to `main.py --input`.
+
+Every input `foo.c` is compiled into `foo.s` (`--riscv`), `foo.tac` (`--tac`) or `foo.ast` (`--parse`)
+next to it. With `-j N`, the inputs are spread over N worker processes, each of which imports the compiler once.
+A failing input doesn't stop the batch; all failures are reported together at the end.
+"""
+
+import os
+import sys
+from collections import Counter
+from typing import TYPE_CHECKING, Optional
+
+from compiler import Compiler
+from utils.error import DecafSyntaxErrors
+
+if TYPE_CHECKING:
+    from utils.cache import CompileCache
+
+# size of the write buffer of output files, so that the emitters' many small writes become few large ones
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# The output suffix of every stage.
+SUFFIXES = {"parse": ".ast", "tac": ".tac", "riscv": ".s"}
+
+
+def collect_inputs(paths: list[str]) -> list[str]:
+    "Expand directories into the `.c` files inside them, in a stable order."
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                inputs += [os.path.join(root, f) for f in sorted(files) if f.endswith(".c")]
+        else:
+            inputs.append(path)
+    return inputs
+
+
+def output_path(path: str, stage: str) -> str:
+    return os.path.splitext(path)[0] + SUFFIXES[stage]
+
+
+def compile_file(
+    path: str,
+    stage: str,
+    lexer: str,
+    parser: str,
+    cache: Optional["CompileCache"],
+    regalloc: str = "local",
+) -> tuple[Optional[str], Counter[str]]:
+    """
+    Compile one input into its output file.
+    Returns the error message if it fails, and the cache counts of this input.
+    """
+    counts = cache.counts.copy() if cache else Counter[str]()
+    error = None
+    try:
+        with open(path, "r") as f:
+            code = f.read()
+        # Write to a temporary file while compiling, and only rename complete outputs into place.
+        output = output_path(path, stage)
+        tmp = output + ".tmp"
+        try:
+            with open(tmp, "w", buffering=OUTPUT_BUFFER_SIZE) as f:
+                Compiler(lexer, parser, cache=cache, regalloc=regalloc).compile(
+                    code, stage, f
+                )
+            os.replace(tmp, output)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    except DecafSyntaxErrors as e:
+        error = str(e)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return error, (cache.counts - counts if cache else counts)
+
+
+def _compile_all(
+    inputs: list[str],
+    stage: str,
+    lexer: str,
+    parser: str,
+    cache: Optional["CompileCache"],
+    jobs: int,
+    regalloc: str = "local",
+) -> list[tuple[Optional[str], Counter[str]]]:
+    n = len(inputs)
+    if jobs <= 1:
+        return [
+            compile_file(path, stage, lexer, parser, cache, regalloc) for path in inputs
+        ]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Large chunks keep the per-task overhead low; several chunks per worker keep the load balanced.
+    # Every worker counts on its own copy of `cache`, so the counts are returned along with the results.
+    chunksize = max(1, n // (jobs * 8))
+    with ProcessPoolExecutor(jobs) as pool:
+        return list(
+            pool.map(
+                compile_file,
+                inputs,
+                [stage] * n,
+                [lexer] * n,
+                [parser] * n,
+                [cache] * n,
+                [regalloc] * n,
+                chunksize=chunksize,
+            )
+        )
+
+
+def compile_batch(
+    paths: list[str],
+    stage: str,
+    lexer: str = "ply",
+    parser: str = "ply",
+    jobs: int = 1,
+    cache: Optional["CompileCache"] = None,
+    regalloc: str = "local",
+) -> int:
+    "Compile every input, report the failures to stderr, and return the number of failures."
+    inputs = collect_inputs(paths)
+    results = _compile_all(inputs, stage, lexer, parser, cache, jobs, regalloc)
+    failures = [
+        (path, error) for path, (error, _) in zip(inputs, results) if error is not None
+    ]
+    if cache is not None and jobs > 1:
+        for _, counts in results:
+            cache.counts += counts
+
+    for path, error in failures:
+        print(f"{path}:\n{error}", file=sys.stderr)
+    if failures:
+        print(f"{len(failures)} of {len(inputs)} files failed", file=sys.stderr)
+    return len(failures)
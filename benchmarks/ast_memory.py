@@ -0,0 +1,76 @@
+"""
+AST memory and traversal benchmark: builds the tree of a large program,
+and reports the memory it holds and the time of walking and annotating every node.
+
+    python3 benchmarks/ast_memory.py [--statements N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frontend.ast.tree  # import the AST modules in the right order
+from frontend.ast.node import Node
+from frontend.lexer import lexers
+from frontend.parser import parsers
+from parser import Generator, render  # benchmarks/parser.py
+
+
+def walk(root: Node) -> int:
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node)
+    return count
+
+
+def annotate(root: Node) -> None:
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node.setattr("val", node)
+        node.getattr("val")
+        stack.extend(node)
+
+
+def timed(job) -> float:
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    job()
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf AST benchmark")
+    parser.add_argument("--statements", type=int, default=100000)
+    args = parser.parse_args()
+
+    code = render(Generator(-1).program(args.statements, depth=2))
+    print(f"input: {len(code) / 1e6:.1f} MB")
+
+    gc.collect()
+    tracemalloc.start()
+    tree = parsers["fast"]().parse(code, lexer=lexers["fast"]())
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"tree: {current / 2**20:.1f} MiB held, {peak / 2**20:.1f} MiB peak while parsing")
+
+    nodes = walk(tree)
+    print(f"{nodes} nodes")
+    print(f"walk: {timed(lambda: walk(tree)):.3f} s")
+    print(f"annotate: {timed(lambda: annotate(tree)):.3f} s")
+    print(f"str: {timed(lambda: str(tree)):.3f} s")
+
+
+if __name__ == "__main__":
+    main()
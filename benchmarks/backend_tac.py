@@ -0,0 +1,132 @@
+"""
+Backend benchmark and fuzzer on synthetic TAC, parsed by `utils/tac/parser.py`, without any MiniDecaf source.
+
+Generates random TAC programs with straight-line code, branches and jumps between blocks,
+checks that printing and parsing them round-trips, runs them through the backend and reports crashes and hangs,
+then times every backend pass on a large program. The large program only has values that are live across blocks
+with `--branches`, since `LocalRegAllocator` doesn't support them yet.
+
+    python3 benchmarks/backend_tac.py [--programs N] [--blocks N] [--instrs N] [--branches] [--regalloc NAME] [--seed N]
+"""
+
+import argparse
+import io
+import os
+import random
+import signal
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frontend.ast.tree  # import the AST modules in the right order
+from backend.riscv.entry import REG_ALLOCATORS
+from compiler import Compiler
+from utils.tac.instructions import Binary, Unary
+from utils.tac.parser import parse_tac
+from utils.timer import PassTimer
+
+UNARY = list(Unary.op_map.values())
+BINARY = list(Binary.op_str.values())
+
+
+# time limit of a fuzzed program, in seconds
+TIME_LIMIT = 2
+
+
+def generate(
+    rng: random.Random, blocks: int, instrs: int, branches: bool = True
+) -> str:
+    """
+    Random TAC in the format of `TACProg.print`. Every temp is defined before it is used.
+    Without branches, every block returns, and only uses the temps it defines.
+    """
+    lines = ["main:"]
+    labels = [".Lmain.%d" % (i + 1) for i in range(blocks)]
+    defined = 0
+    for i, label in enumerate(labels):
+        lines.append(label + ":")
+        first = defined + 1 if not branches else 1
+        for _ in range(instrs):
+            kind = rng.randrange(6) if defined >= first else 0
+            operand = lambda: "_T%d" % rng.randint(first, defined)
+            dst = "_T%d" % (defined + 1)
+            if kind == 0:
+                lines.append("    %s = %d" % (dst, rng.randint(-(2**31), 2**31 - 1)))
+            elif kind == 1:
+                lines.append("    %s = %s" % (dst, operand()))
+            elif kind == 2:
+                lines.append("    %s = %s %s" % (dst, rng.choice(UNARY), operand()))
+            else:
+                op = rng.choice(BINARY)
+                lines.append("    %s = (%s %s %s)" % (dst, operand(), op, operand()))
+            defined += 1
+
+        kind = rng.randrange(3) if branches and i + 1 < blocks else 0
+        if kind == 0:
+            lines.append("    return _T%d" % rng.randint(first, defined))
+        elif kind == 1:
+            lines.append("    jump %s" % rng.choice(labels))
+        else:
+            targets = rng.choice(labels), rng.choice(labels)
+            lines.append("    br _T%d, %s, %s" % (rng.randint(1, defined), *targets))
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf backend benchmark on TAC")
+    parser.add_argument("--programs", type=int, default=500, help="programs to fuzz")
+    parser.add_argument(
+        "--blocks", type=int, default=2000, help="size of the timed program"
+    )
+    parser.add_argument("--instrs", type=int, default=50, help="instructions per block")
+    parser.add_argument(
+        "--branches",
+        action="store_true",
+        help="branch between the blocks of the timed program",
+    )
+    parser.add_argument(
+        "--regalloc", choices=REG_ALLOCATORS.keys(), default="local"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    def timeout(signum, frame):
+        raise TimeoutError(f"no result after {TIME_LIMIT} s")
+
+    signal.signal(signal.SIGALRM, timeout)
+    failures = 0
+    for i in range(args.programs):
+        text = generate(rng, rng.randint(1, 8), rng.randint(1, 10))
+        signal.alarm(TIME_LIMIT)
+        try:
+            tac = parse_tac(text)
+            out = io.StringIO()
+            tac.print(out)
+            if out.getvalue() != text:
+                raise AssertionError("printing the parsed TAC doesn't round-trip")
+            Compiler(regalloc=args.regalloc).emit_tac(tac, "riscv", io.StringIO())
+        except Exception:
+            failures += 1
+            if failures == 1:
+                print(f"first failure, on:\n{text}")
+                traceback.print_exc()
+        finally:
+            signal.alarm(0)
+    print(f"fuzz: {failures} of {args.programs} programs failed")
+
+    text = generate(random.Random(args.seed), args.blocks, args.instrs, args.branches)
+    start = time.perf_counter()
+    tac = parse_tac(text)
+    print(f"parse {len(text) / 1e6:.1f} MB of TAC: {time.perf_counter() - start:.2f} s")
+
+    timer = PassTimer()
+    with open(os.devnull, "w") as f:
+        Compiler(timer=timer, regalloc=args.regalloc).emit_tac(tac, "riscv", f)
+    timer.print(sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compile daemon benchmark: requests per second of cold `main.py` runs,
+`client.py` runs against `main.py --serve`, and raw requests sent to the daemon.
+
+    python3 benchmarks/daemon.py [-n REQUESTS] [--stage parse/tac/riscv]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import daemon
+
+SOURCE = "int main() {\n    return 1 + 2 * 3 - -4;\n}\n"
+
+
+def throughput(n: int, job) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        job()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf daemon benchmark")
+    parser.add_argument("-n", type=int, default=50, help="number of requests")
+    parser.add_argument("--stage", choices=("parse", "tac", "riscv"), default="tac")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "main.c")
+        with open(source, "w") as f:
+            f.write(SOURCE)
+        sock = os.path.join(tmp, "minidecaf.sock")
+        argv = ["--input", source, f"--{args.stage}"]
+
+        main_py = os.path.join(ROOT, "main.py")
+        client_py = os.path.join(ROOT, "client.py")
+        run = lambda *cmd: subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+
+        server = subprocess.Popen([sys.executable, main_py, "--serve", sock])
+        try:
+            while not os.path.exists(sock):
+                time.sleep(0.01)
+
+            cold = throughput(args.n, lambda: run(sys.executable, main_py, *argv))
+            client = throughput(
+                args.n, lambda: run(sys.executable, client_py, "--socket", sock, *argv)
+            )
+            raw = throughput(args.n * 10, lambda: daemon.request(sock, argv, SOURCE, os.getcwd()))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"cold main.py: {cold:8.1f} requests/s")
+    print(f"client.py:    {client:8.1f} requests/s")
+    print(f"raw requests: {raw:8.1f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
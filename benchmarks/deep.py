@@ -0,0 +1,59 @@
+"""
+Deep nesting benchmark: compiles programs nested DEPTH levels deep
+(`else if` chains, parenthesized expressions and blocks) under the default recursion limit.
+
+    python3 benchmarks/deep.py [--depth N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Compiler
+
+
+def else_if_chain(depth: int) -> str:
+    chain = " else ".join(f"if ({i}) return {i};" for i in range(depth))
+    return f"int main() {{ {chain} return 0; }}"
+
+
+def nested_expression(depth: int) -> str:
+    return "int main() { return %s1%s; }" % ("1 - (" * depth, ")" * depth)
+
+
+def nested_blocks(depth: int) -> str:
+    return "int main() { %sreturn 1;%s }" % ("{ " * depth, " }" * depth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf deep nesting benchmark")
+    parser.add_argument("--depth", type=int, default=10000)
+    args = parser.parse_args()
+    print(f"recursion limit: {sys.getrecursionlimit()}, depth: {args.depth}")
+
+    for name, generate in (
+        ("else if", else_if_chain),
+        ("expression", nested_expression),
+        ("blocks", nested_blocks),
+    ):
+        code = generate(args.depth)
+        # the LALR parser doesn't recurse, unlike the hand-written one
+        compiler = Compiler(parser="ply")
+        start = time.perf_counter()
+        trees = [compiler.parse(code) for _ in range(3)]
+        parse = (time.perf_counter() - start) / 3
+
+        start = time.perf_counter()
+        str(trees[0])
+        compiler.emit(trees[1], "parse", io.StringIO())
+        compiler.emit(trees[2], "tac", io.StringIO())
+        traverse = time.perf_counter() - start
+        print(f"{name:>10}: parse {parse:.2f} s, str + print + tac {traverse:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Diagnostics benchmark: times lexing and parsing a large program that is full of errors,
+where reporting the errors used to take time and memory quadratic in the size of the input.
+
+    python3 benchmarks/diagnostics.py [--statements N] [--seed N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import Generator, render
+
+import frontend.ast.tree  # import the AST modules in the right order
+from frontend.lexer import lexers
+from frontend.parser import parsers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf diagnostics benchmark")
+    parser.add_argument(
+        "--statements", type=int, default=20000, help="size of the program"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.setrecursionlimit(100000)
+
+    gen = Generator(args.seed)
+    tokens = gen.program(args.statements, depth=2)
+    # a lex error and a syntax error after every statement
+    tokens = [tok + " @ )" if tok == ";" else tok for tok in tokens]
+    code = render(tokens)
+    print(f"input: {len(code) / 1e6:.1f} MB")
+
+    for name in parsers:
+        start = time.perf_counter()
+        lexer = lexers[name]()
+        parser = parsers[name]()
+        parser.parse(code, lexer=lexer)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>5}: {elapsed:.2f} s, {len(lexer.error_stack)} lex errors,"
+            f" {len(parser.error_stack)} syntax errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
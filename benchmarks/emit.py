@@ -0,0 +1,62 @@
+"""
+Emitter benchmark: times writing the AST, TAC and assembly of a huge program to /dev/null,
+and measures the memory that writing takes, compared to building the whole text first.
+
+    python3 benchmarks/emit.py [--statements N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frontend.ast.tree  # import the AST modules in the right order
+from backend.riscv.misc import AsmCodePrinter
+from compiler import Compiler
+from utils.printtree import TreePrinter
+
+
+def program(statements: int) -> str:
+    body = "".join(f"    {i} * {i + 1} + {i + 2};\n" for i in range(statements))
+    return f"int main() {{\n{body}    return 0;\n}}\n"
+
+
+def measure(name: str, emit) -> None:
+    "Time an emitter, then run it again to trace its peak memory (tracing slows it down)."
+    with open(os.devnull, "w", buffering=1024 * 1024) as f:
+        start = time.perf_counter()
+        emit(f)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        emit(f)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(f"{name:>18}: {elapsed:.2f} s, {peak / 2**20:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf emitter benchmark")
+    parser.add_argument("--statements", type=int, default=100000)
+    args = parser.parse_args()
+
+    compiler = Compiler(parser="fast", lexer="fast")
+    ast = compiler.parse(program(args.statements))
+    measure("AST", lambda f: TreePrinter(indent_len=2, file=f).print(ast))
+
+    tac = compiler.tac(ast)
+    measure("TAC", lambda f: tac.print(f))
+    measure("TAC as one string", lambda f: f.write(str(tac) + "\n"))
+
+    asm = compiler.asm(tac)
+    measure("asm", lambda f: AsmCodePrinter().print(asm, f))
+    measure(
+        "asm as one string",
+        lambda f: f.write("\n".join(str(fn) for fn in asm.funcs) + "\n"),
+    )
+
+
+if __name__ == "__main__":
+    main()
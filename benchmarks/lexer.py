@@ -0,0 +1,73 @@
+"""
+Lexer benchmark: tokens per second of `ply_lexer` and `fast_lexer` on a large generated input.
+Both lexers must produce the same token stream.
+
+    python3 benchmarks/lexer.py [--statements N]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frontend.ast.tree  # import the AST modules in the right order
+from frontend.lexer import lexers
+
+
+def generate(statements: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    ops = ["+", "-", "*", "/", "%", "<", "<=", ">", ">=", "==", "!=", "&&", "||"]
+    lines = ["int main() {", "    int x = 0;"]
+    for i in range(statements):
+        expr = " ".join(
+            f"{rng.choice(['x', str(rng.randrange(1000))])} {rng.choice(ops)}"
+            for _ in range(rng.randrange(1, 8))
+        )
+        if i % 16 == 0:
+            lines.append(f"    // statement {i}")
+        if i % 64 == 0:
+            lines.append(f"    /* block\n       comment {i} */")
+        lines.append(f"    if (x) x = {expr} ({i}); else x = -x;")
+    lines += ["    return x;", "}", ""]
+    return "\n".join(lines)
+
+
+def tokenize(name: str, code: str) -> list:
+    lexer = lexers[name]()
+    lexer.input(code)
+    return list(iter(lexer.token, None))
+
+
+def summary(tokens: list) -> list[tuple]:
+    return [(t.type, str(t.value), t.lineno, t.lexpos) for t in tokens]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf lexer benchmark")
+    parser.add_argument("--statements", type=int, default=50000)
+    args = parser.parse_args()
+
+    code = generate(args.statements)
+    print(f"input: {len(code) / 1e6:.1f} MB")
+
+    results = {}
+    for name in lexers:
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        results[name] = tokenize(name, code)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        n = len(results[name])
+        print(f"{name:>5}: {n} tokens in {elapsed:.2f} s, {n / elapsed:,.0f} tokens/s")
+
+    if summary(results["ply"]) != summary(results["fast"]):
+        sys.exit("token streams differ")
+
+
+if __name__ == "__main__":
+    main()
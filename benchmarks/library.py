@@ -0,0 +1,62 @@
+"""
+Library API check: compiles a corpus with `compile_source` one by one and then from a thread pool,
+and checks that every program gets the same output (or the same error) both ways.
+
+    python3 benchmarks/library.py [--programs N] [--threads N] [--stage parse/tac/riscv]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import STAGES, compile_source
+from parser import Generator, render  # benchmarks/parser.py
+
+
+def corpus(n: int) -> list[str]:
+    programs = []
+    for seed in range(n):
+        gen = Generator(seed)
+        tokens = gen.program(gen.rng.randrange(1, 10))
+        programs += [render(tokens), render(gen.mutate(tokens))]
+    return programs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf library API check")
+    parser.add_argument("--programs", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--stage", choices=STAGES, default="tac")
+    args = parser.parse_args()
+
+    programs = corpus(args.programs)
+
+    def job(i: int) -> str:
+        # alternate between the lexers and parsers to mix their state as much as possible
+        name = ("ply", "fast")[i % 2]
+        try:
+            return compile_source(programs[i], args.stage, lexer=name, parser=name)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    start = time.perf_counter()
+    expected = [job(i) for i in range(len(programs))]
+    print(f"sequential: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        actual = list(pool.map(job, range(len(programs))))
+    print(f"{args.threads} threads: {time.perf_counter() - start:.2f} s")
+
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+    print(f"{len(programs)} programs, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
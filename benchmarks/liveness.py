@@ -0,0 +1,87 @@
+"""
+Liveness analysis benchmark on functions with thousands of blocks, generated as random TAC with branches
+(see `benchmarks/backend_tac.py`) and translated to native instructions.
+Times `LivenessAnalyzer` at block level, with the live-out sets of every instruction computed on demand,
+and with `do_instr_level`, and checks its results against a reference solver
+with round-robin sweeps over Python sets.
+
+    python3 benchmarks/liveness.py [--blocks N] [--instrs N] [--seed N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frontend.ast.tree  # import the AST modules in the right order
+from backend.riscv.analysis.control_flow_graph import ControlFlowGraph
+from backend.riscv.analysis.liveness import LivenessAnalyzer
+from backend.riscv.entry import ProgramTranslator
+from benchmarks.backend_tac import generate
+from utils.tac.parser import parse_tac
+
+
+def reference(graph: ControlFlowGraph) -> list[tuple[set, set]]:
+    "Live-in and live-out sets of every block, by sweeping over the blocks until nothing changes."
+    define, live_in, live_out = [], [], []
+    for bb in graph:
+        defs, uses = set(), set()
+        for instr in bb:
+            uses.update(u for u in instr.uses() if u not in defs)
+            defs.update(instr.defs())
+        define.append(defs)
+        live_in.append(uses)
+        live_out.append(set())
+
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(graph)):
+            for j in graph.succ(i):
+                live_out[i] |= live_in[j]
+            before = len(live_in[i])
+            live_in[i] |= live_out[i] - define[i]
+            changed |= len(live_in[i]) != before
+    return list(zip(live_in, live_out))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf liveness analysis benchmark")
+    parser.add_argument("--blocks", type=int, default=4000)
+    parser.add_argument("--instrs", type=int, default=10, help="instructions per block")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tac = parse_tac(generate(random.Random(args.seed), args.blocks, args.instrs))
+    fn = ProgramTranslator()(tac).funcs[0]
+    graph = ControlFlowGraph(fn.blocks)
+    print(f"{len(graph)} blocks, {sum(len(bb.instrs) for bb in graph)} instructions")
+
+    start = time.perf_counter()
+    expected = reference(graph)
+    print(f"   reference: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    res = LivenessAnalyzer()(graph)
+    print(f"block level: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    for bb, bl in zip(graph, res):
+        bl.instr_live_out(bb)
+    print(f"  on demand: {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    LivenessAnalyzer()(graph, do_instr_level=True)
+    print(f"instr level: {time.perf_counter() - start:.2f} s")
+
+    same = [(bl.live_in, bl.live_out) for bl in res] == expected
+    print(f"results {'identical' if same else 'DIFFERENT'}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Backend benchmark: runs a program with many functions through the backend serially
+and with `--backend-jobs`, and checks that the outputs are byte-identical.
+
+The grammar only allows `main` so far, so the program is assembled from parsed functions renamed afterwards.
+
+    python3 benchmarks/parallel_backend.py [--functions N] [--terms N] [--jobs N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Compiler
+from frontend.ast.tree import Identifier, Program
+
+
+def program(functions: int, terms: int) -> Program:
+    compiler = Compiler(parser="fast")
+    funcs = []
+    for i in range(functions):
+        expr = " + ".join(f"{i + j} * {j + 1}" for j in range(terms))
+        func = compiler.parse(f"int main() {{ return {expr}; }}").children[0]
+        if i > 0:
+            func.ident = Identifier(f"f{i}")
+        funcs.append(func)
+    return Program(*funcs)
+
+
+def generate(jobs: int, functions: int, terms: int) -> tuple[str, float]:
+    prog = program(functions, terms)  # the passes modify the program, so build a new one
+    out = io.StringIO()
+    start = time.perf_counter()
+    Compiler(jobs=jobs).emit(prog, "riscv", out)
+    return out.getvalue(), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf backend benchmark")
+    parser.add_argument("--functions", type=int, default=300)
+    parser.add_argument("--terms", type=int, default=50)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    serial, elapsed = generate(1, args.functions, args.terms)
+    print(f"serial: {elapsed:.2f} s")
+    parallel, elapsed = generate(args.jobs, args.functions, args.terms)
+    print(f"{args.jobs} jobs: {elapsed:.2f} s")
+
+    identical = serial == parallel
+    print(f"output: {'identical' if identical else 'DIFFERENT'}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
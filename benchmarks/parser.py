@@ -0,0 +1,195 @@
+"""
+Parser benchmark and cross-check.
+
+Checks that `fast_parser` builds the same AST and reports the same syntax errors as `ply_parser`
+on a corpus of random programs, randomly mutated programs and the given input files,
+then times both parsers on a large expression-heavy program.
+
+    python3 benchmarks/parser.py [--programs N] [--statements N] [FILE_OR_DIR ...]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frontend.ast.tree  # import the AST modules in the right order
+from frontend.lexer import lexers
+from frontend.parser import parsers
+
+BINARY = [
+    "+",
+    "-",
+    "*",
+    "/",
+    "%",
+    "<",
+    "<=",
+    ">",
+    ">=",
+    "==",
+    "!=",
+    "&&",
+    "||",
+    "&",
+    "|",
+    "^",
+]
+UNARY = ["-", "~", "!"]
+VARS = ["a", "b", "c", "x"]
+
+
+class Generator:
+    def __init__(self, seed: int) -> None:
+        self.rng = random.Random(seed)
+
+    def expr(self, depth: int, assign: bool = True) -> list[str]:
+        "`assign`: whether an assignment is allowed here without parentheses."
+        rng = self.rng
+        if depth <= 0 or rng.random() < 0.2:
+            return [rng.choice(VARS + [str(rng.randrange(100))])]
+        kind = rng.randrange(6)
+        if kind == 0:
+            return [rng.choice(UNARY)] + self.expr(depth - 1, False)
+        if kind == 1:
+            return ["("] + self.expr(depth - 1) + [")"]
+        if kind == 2 and assign:
+            return [rng.choice(VARS), "="] + self.expr(depth - 1)
+        if kind == 3:
+            cond = self.expr(depth - 1, False)
+            then = self.expr(depth - 1)
+            return cond + ["?"] + then + [":"] + self.expr(depth - 1, False)
+        lhs = self.expr(depth - 1, False)
+        return lhs + [rng.choice(BINARY)] + self.expr(depth - 1, False)
+
+    def stmt(self, depth: int) -> list[str]:
+        rng = self.rng
+        kind = rng.randrange(8) if depth > 0 else 0
+        if kind <= 1:
+            return self.expr(4) + [";"]
+        if kind == 2:
+            return ["return"] + self.expr(3) + [";"]
+        if kind == 3:
+            s = ["if", "("] + self.expr(3) + [")"] + self.stmt(depth - 1)
+            return s + (["else"] + self.stmt(depth - 1) if rng.random() < 0.5 else [])
+        if kind == 4:
+            return ["while", "("] + self.expr(3) + [")"] + self.stmt(depth - 1)
+        if kind == 5:
+            return ["{"] + self.items(depth - 1, rng.randrange(4)) + ["}"]
+        if kind == 6:
+            return ["break", ";"]
+        return [";"]
+
+    def items(self, depth: int, n: int) -> list[str]:
+        tokens = []
+        for _ in range(n):
+            if self.rng.random() < 0.2:
+                tokens += ["int", self.rng.choice(VARS)]
+                if self.rng.random() < 0.5:
+                    tokens += ["="] + self.expr(3)
+                tokens.append(";")
+            else:
+                tokens += self.stmt(depth)
+        return tokens
+
+    def program(self, statements: int, depth: int = 3) -> list[str]:
+        return ["int", "main", "(", ")", "{"] + self.items(depth, statements) + ["}"]
+
+    def mutate(self, tokens: list[str]) -> list[str]:
+        tokens = tokens.copy()
+        for _ in range(self.rng.randrange(1, 4)):
+            i = self.rng.randrange(len(tokens))
+            kind = self.rng.randrange(3)
+            if kind == 0:
+                del tokens[i]
+            elif kind == 1:
+                tokens.insert(i, self.rng.choice(tokens))
+            else:
+                tokens[i] = self.rng.choice(tokens)
+        return tokens
+
+
+def render(tokens: list[str]) -> str:
+    lines, line = [], []
+    for tok in tokens:
+        line.append(tok)
+        if tok in (";", "{", "}") or len(line) > 12:
+            lines.append(" ".join(line))
+            line = []
+    lines.append(" ".join(line))
+    return "\n".join(lines) + "\n"
+
+
+def parse(name: str, code: str, lexer: str = "ply"):
+    parser = parsers[name]()
+    ast = parser.parse(code, lexer=lexers[lexer]())
+    return ast, [str(e) for e in parser.error_stack]
+
+
+def check(code: str) -> bool:
+    expected = parse("ply", code)
+    actual = parse("fast", code)
+    return str(expected[0]) == str(actual[0]) and expected[1] == actual[1]
+
+
+def corpus_files(paths: list[str]):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                yield from (
+                    os.path.join(root, f) for f in sorted(files) if f.endswith(".c")
+                )
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf parser benchmark")
+    parser.add_argument(
+        "--programs", type=int, default=2000, help="number of random programs"
+    )
+    parser.add_argument(
+        "--statements", type=int, default=20000, help="size of the timed program"
+    )
+    parser.add_argument("corpus", nargs="*", help="extra input files or directories")
+    args = parser.parse_args()
+    sys.setrecursionlimit(100000)
+
+    failures = 0
+    for path in corpus_files(args.corpus):
+        with open(path) as f:
+            if not check(f.read()):
+                failures += 1
+                print(f"mismatch: {path}")
+
+    for seed in range(args.programs):
+        gen = Generator(seed)
+        tokens = gen.program(gen.rng.randrange(1, 10))
+        for code in (render(tokens), render(gen.mutate(tokens))):
+            if not check(code):
+                failures += 1
+                print(f"mismatch:\n{code}")
+    print(f"cross-check: {failures} mismatches")
+
+    code = render(Generator(-1).program(args.statements, depth=2))
+    print(f"input: {len(code) / 1e6:.1f} MB")
+    results = {}
+    for name in parsers:
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        results[name] = parse(name, code, lexer="fast")
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        print(f"{name:>5}: {elapsed:.2f} s")
+
+    if failures or str(results["ply"]) != str(results["fast"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+Register allocator benchmark on loop kernels written in TAC.
+
+Runs every kernel through the backend with every register allocator of `--regalloc`, and reports:
+    - the static number of spill instructions (stack loads and stores) after register allocation,
+    - the dynamic number of instructions executed, by interpreting the generated code,
+    - the time of register allocation.
+The result of the generated code is checked against an interpreter of the TAC.
+An allocator that fails or takes longer than `TIME_LIMIT` on a kernel is reported as such.
+
+The register pressure kernels keep N values live at once, in a loop and in a single block. The window kernel is a
+single block where every value is used again at a random distance, so that the choice of evicted values matters.
+
+Then compile time is measured across function sizes, on random TAC of `benchmarks/backend_tac.py` with blocks of
+50 instructions, along with the spill instructions and the total instructions after register allocation.
+Without branches, every block only uses the values it defines, which `LocalRegAllocator` supports.
+With `--branches`, most values are live across blocks and the register pressure is high.
+
+    python3 benchmarks/regalloc.py [--accumulators N] [--sizes N,N,...] [--branches]
+"""
+
+import argparse
+import os
+import random
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frontend.ast.tree  # import the AST modules in the right order
+from backend.riscv import instructions as native
+from backend.riscv.entry import REG_ALLOCATORS, ProgramTranslator, backend_passes
+from backend.riscv.program import NativeFunc
+from backend.riscv.reg import GPRegs
+from utils.tac import instructions as tac
+from utils.tac.parser import parse_tac
+from utils.tac.program import TACFunc
+from benchmarks.backend_tac import generate
+
+# time limit of an allocator on a kernel, in seconds
+TIME_LIMIT = 10
+# time limit of an allocator on a function of the scaling benchmark, in seconds
+SCALING_TIME_LIMIT = 120
+# instructions an interpreter runs before giving up
+STEP_LIMIT = 10**7
+
+SUM_OF_SQUARES = """\
+main:
+.L1:
+    _T1 = 0
+    _T2 = 0
+    _T3 = 100
+    jump .L2
+.L2:
+    _T4 = (_T2 < _T3)
+    br _T4, .L4, .L3
+.L3:
+    _T5 = (_T2 * _T2)
+    _T1 = (_T1 + _T5)
+    _T6 = 1
+    _T2 = (_T2 + _T6)
+    jump .L2
+.L4:
+    return _T1
+"""
+
+NESTED_LOOPS = """\
+main:
+.L1:
+    _T1 = 0
+    _T2 = 0
+    _T3 = 30
+    _T4 = 1
+    _T5 = 7
+    jump .L2
+.L2:
+    _T6 = (_T2 < _T3)
+    br _T6, .L7, .L3
+.L3:
+    _T7 = 0
+    jump .L4
+.L4:
+    _T8 = (_T7 < _T3)
+    br _T8, .L6, .L5
+.L5:
+    _T9 = (_T2 * _T7)
+    _T10 = (_T9 % _T5)
+    _T1 = (_T1 + _T10)
+    _T7 = (_T7 + _T4)
+    jump .L4
+.L6:
+    _T2 = (_T2 + _T4)
+    jump .L2
+.L7:
+    return _T1
+"""
+
+FIBONACCI = """\
+main:
+.L1:
+    _T1 = 0
+    _T2 = 1
+    _T3 = 0
+    _T4 = 40
+    _T5 = 1
+    jump .L2
+.L2:
+    _T6 = (_T3 < _T4)
+    br _T6, .L4, .L3
+.L3:
+    _T7 = (_T1 + _T2)
+    _T1 = _T2
+    _T2 = _T7
+    _T3 = (_T3 + _T5)
+    jump .L2
+.L4:
+    return _T1
+"""
+
+GCD_SUM = """\
+main:
+.L1:
+    _T1 = 0
+    _T2 = 1
+    _T3 = 200
+    _T4 = 1
+    _T5 = 360
+    jump .L2
+.L2:
+    _T6 = (_T2 <= _T3)
+    br _T6, .L6, .L3
+.L3:
+    _T7 = _T5
+    _T8 = _T2
+    jump .L4
+.L4:
+    br _T8, .L5, .L7
+.L7:
+    _T9 = (_T7 % _T8)
+    _T7 = _T8
+    _T8 = _T9
+    jump .L4
+.L5:
+    _T1 = (_T1 + _T7)
+    _T2 = (_T2 + _T4)
+    jump .L2
+.L6:
+    return _T1
+"""
+
+
+def accumulators(n: int, iterations: int = 50) -> str:
+    "A loop that updates `n` accumulators, which are all live across the loop, and then sums them."
+    acc = ["_T%d" % (10 + k) for k in range(n)]
+    t = 10 + n
+    lines = ["main:", ".L1:", "    _T1 = 0", "    _T2 = %d" % iterations, "    _T3 = 1"]
+    lines += ["    %s = %d" % (a, k) for k, a in enumerate(acc)]
+    lines += ["    jump .L2", ".L2:", "    _T4 = (_T1 < _T2)", "    br _T4, .L4, .L3"]
+    lines.append(".L3:")
+    for k, a in enumerate(acc):
+        lines.append("    _T%d = %d" % (t, k + 1))
+        lines.append("    _T%d = (_T1 * _T%d)" % (t + 1, t))
+        lines.append("    %s = (%s + _T%d)" % (a, a, t + 1))
+        t += 2
+    lines += ["    _T1 = (_T1 + _T3)", "    jump .L2", ".L4:", "    _T5 = 0"]
+    lines += ["    _T5 = (_T5 + %s)" % a for a in acc]
+    lines.append("    return _T5")
+    return "\n".join(lines) + "\n"
+
+
+def straight_line(n: int) -> str:
+    "A single block that computes `n` values and then sums them, so that all of them are live at once."
+    values = ["_T%d" % (10 + k) for k in range(n)]
+    lines = ["main:", ".L1:"]
+    lines += ["    %s = %d" % (v, 3 * k + 1) for k, v in enumerate(values)]
+    lines.append("    _T1 = 0")
+    lines += ["    _T1 = (_T1 + %s)" % v for v in reversed(values)]
+    lines.append("    return _T1")
+    return "\n".join(lines) + "\n"
+
+
+def sliding_window(n: int, window: int, seed: int = 0) -> str:
+    "A single block of `n` values, each the sum of two random values among the `window` previous ones."
+    rng = random.Random(seed)
+    lines = ["main:", ".L1:"]
+    lines += ["    _T%d = %d" % (10 + k, k) for k in range(window)]
+    for k in range(window, n):
+        a, b = rng.randrange(k - window, k), rng.randrange(k - window, k)
+        lines.append("    _T%d = (_T%d + _T%d)" % (10 + k, 10 + a, 10 + b))
+    lines.append("    _T1 = 0")
+    lines += ["    _T1 = (_T1 + _T%d)" % (10 + k) for k in range(n - window, n)]
+    lines.append("    return _T1")
+    return "\n".join(lines) + "\n"
+
+
+def wrap(x: int) -> int:
+    return (x + 2**31) % 2**32 - 2**31
+
+
+def div(a: int, b: int) -> int:
+    if b == 0:
+        return -1
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+# semantics of operators, by their names in native instructions
+UNARY = {"neg": lambda a: -a, "not": lambda a: ~a, "seqz": lambda a: int(a == 0)}
+BINARY = {
+    "add": lambda a, b: a + b,
+    "sub": lambda a, b: a - b,
+    "mul": lambda a, b: a * b,
+    "div": div,
+    "rem": lambda a, b: a - div(a, b) * b if b else a,
+    "equ": lambda a, b: int(a == b),
+    "neq": lambda a, b: int(a != b),
+    "slt": lambda a, b: int(a < b),
+    "leq": lambda a, b: int(a <= b),
+    "sgt": lambda a, b: int(a > b),
+    "geq": lambda a, b: int(a >= b),
+    "and": lambda a, b: int(a != 0 and b != 0),
+    "or": lambda a, b: int(a != 0 or b != 0),
+}
+BRANCH = {
+    "beq": lambda a, b: a == b,
+    "bne": lambda a, b: a != b,
+    "blt": lambda a, b: a < b,
+    "bge": lambda a, b: a >= b,
+}
+
+
+def run_tac(fn: TACFunc) -> int:
+    "The return value of a TAC function."
+    index = {bb.label: i for i, bb in enumerate(fn.blocks)}
+    values = {}
+    b = i = 0
+    for _ in range(STEP_LIMIT):
+        instrs = fn.blocks[b].instrs
+        if i == len(instrs):
+            b, i = b + 1, 0
+            continue
+        instr = instrs[i]
+        i += 1
+        match instr:
+            case tac.Assign(dst=dst, src=src):
+                values[dst] = values[src]
+            case tac.LoadImm32(dst=dst, value=value):
+                values[dst] = value
+            case tac.Unary(op=op, dst=dst, operand=operand):
+                values[dst] = wrap(UNARY[op.name.lower()](values[operand]))
+            case tac.Binary(op=op, dst=dst, lhs=lhs, rhs=rhs):
+                values[dst] = wrap(BINARY[op.name.lower()](values[lhs], values[rhs]))
+            case tac.Jump(target=target):
+                b, i = index[target.label], 0
+            case tac.Branch(cond=cond, false_target=f_tgt, true_target=t_tgt):
+                b, i = index[(t_tgt if values[cond] else f_tgt).label], 0
+            case tac.Return(value=value):
+                return values[value]
+            case _:
+                raise ValueError(f"cannot interpret {instr}")
+    raise TimeoutError("too many instructions")
+
+
+def run_native(fn: NativeFunc) -> tuple[int, int]:
+    "The return value of a function of generated code, and the number of instructions it executes."
+    index = {bb.label: i for i, bb in enumerate(fn.blocks)}
+    regs = {GPRegs.SP: 2**20}
+    mem = {}
+    get = lambda r: 0 if r is GPRegs.ZERO else regs.get(r, 0)
+    b = i = 0
+    for count in range(STEP_LIMIT):
+        instrs = fn.blocks[b].instrs
+        while i == len(instrs):
+            b, i = b + 1, 0
+            instrs = fn.blocks[b].instrs
+        instr = instrs[i]
+        i += 1
+        match instr:
+            case native.LoadImm32(dst=dst, value=value):
+                regs[dst] = value
+            case native.Move(dst=dst, src=src) | tac.Assign(dst=dst, src=src):
+                regs[dst] = get(src)
+            case native.Unary(op=op, dst=dst, src=src):
+                regs[dst] = wrap(UNARY[op](get(src)))
+            case native.Binary(op=op, dst=dst, src1=src1, src2=src2):
+                regs[dst] = wrap(BINARY[op](get(src1), get(src2)))
+            case native.AddI(dst=dst, src=src, imm=imm):
+                regs[dst] = wrap(get(src) + imm)
+            case native.Load(dst=dst, base=base, offset=offset):
+                regs[dst] = mem.get(get(base) + offset, 0)
+            case native.Store(src=src, base=base, offset=offset):
+                mem[get(base) + offset] = get(src)
+            case native.CmpBranch(op=op, src1=src1, src2=src2, target=target):
+                # (the mnemonic is printed with a leading dot)
+                if BRANCH[op.lstrip(".")](get(src1), get(src2)):
+                    b, i = index[target.label], 0
+            case native.Jump(target=target):
+                b, i = index[target.label], 0
+            case native.NativeRet():
+                return get(GPRegs.A0), count + 1
+            case _:
+                raise ValueError(f"cannot interpret {instr}")
+    raise TimeoutError("too many instructions")
+
+
+def count_spills(fn: NativeFunc) -> tuple[int, int, int]:
+    "Stack loads, stack stores and instructions of a function after register allocation."
+    instrs = [instr for bb in fn.blocks for instr in bb]
+    loads = sum(isinstance(instr, native.StackLoad) for instr in instrs)
+    stores = sum(
+        isinstance(instr, (native.StackStore, native.LoadStackAddr)) for instr in instrs
+    )
+    return loads, stores, len(instrs)
+
+
+def measure(text: str, regalloc: str) -> str:
+    expected = run_tac(parse_tac(text).funcs[0])
+    prog = ProgramTranslator()(parse_tac(text))
+    allocator, emitter = backend_passes(regalloc)
+    start = time.perf_counter()
+    prog = allocator(prog)
+    elapsed = time.perf_counter() - start
+
+    loads, stores, _ = count_spills(prog.funcs[0])
+    result, count = run_native(emitter(prog).funcs[0])
+    if result != expected:
+        return f"WRONG RESULT {result}, expected {expected}"
+    return f"{loads:>6} {stores:>7} {count:>10} {elapsed:>9.3f}"
+
+
+def measure_scaling(text: str, regalloc: str) -> str:
+    prog = ProgramTranslator()(parse_tac(text))
+    allocator, _ = backend_passes(regalloc)
+    start = time.perf_counter()
+    prog = allocator(prog)
+    elapsed = time.perf_counter() - start
+    loads, stores, total = count_spills(prog.funcs[0])
+    return f"{loads:>6} {stores:>7} {total:>10} {elapsed:>9.3f}"
+
+
+def run_all(run, cases: dict[str, str], time_limit: int) -> None:
+    def timeout(signum, frame):
+        raise TimeoutError(f"no result after {time_limit} s")
+
+    signal.signal(signal.SIGALRM, timeout)
+    for name, text in cases.items():
+        for regalloc in REG_ALLOCATORS:
+            signal.alarm(time_limit)
+            try:
+                row = run(text, regalloc)
+            except Exception as e:
+                row = f"{type(e).__name__}: {e}"
+            finally:
+                signal.alarm(0)
+            print(f"{name:<16} {regalloc:<8} {row}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf register allocator benchmark")
+    parser.add_argument(
+        "--accumulators",
+        type=int,
+        default=32,
+        help="accumulators of the register pressure kernel",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[1000, 10000, 50000, 100000, 200000],
+        help="instructions of the functions of the scaling benchmark",
+    )
+    parser.add_argument(
+        "--branches",
+        action="store_true",
+        help="functions of the scaling benchmark with branches and jumps between blocks",
+    )
+    args = parser.parse_args()
+    kernels = {
+        "sum of squares": SUM_OF_SQUARES,
+        "nested loops": NESTED_LOOPS,
+        "fibonacci": FIBONACCI,
+        "gcd sum": GCD_SUM,
+        f"{args.accumulators} accumulators": accumulators(args.accumulators),
+        f"{args.accumulators} values": straight_line(args.accumulators),
+        f"{2 * args.accumulators} window": sliding_window(500, 2 * args.accumulators),
+    }
+
+    print(f"{'kernel':<16} {'regalloc':<8} {'loads':>6} {'stores':>7} {'executed':>10} {'time (s)':>9}")
+    run_all(measure, kernels, TIME_LIMIT)
+
+    sizes = {
+        f"{n} instrs": generate(random.Random(0), max(n // 50, 1), 50, args.branches)
+        for n in args.sizes
+    }
+    print()
+    print(f"{'function':<16} {'regalloc':<8} {'loads':>6} {'stores':>7} {'total':>10} {'time (s)':>9}")
+    run_all(measure_scaling, sizes, SCALING_TIME_LIMIT)
+
+
+if __name__ == "__main__":
+    main()
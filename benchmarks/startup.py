@@ -0,0 +1,75 @@
+"""
+Start-up benchmark: time `main.py --parse` on a trivial input with the prebuilt ply tables (`frontend.tablegen`),
+against the baseline, where ply caches `parsetab` by itself and the lexer is built on every run.
+The time of a cold start, which builds and caches the LALR tables, is shown for reference.
+
+    python3 benchmarks/startup.py [-n RUNS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TABLES = (
+    os.path.join(ROOT, "frontend", "lexer", "lextab.py"),
+    os.path.join(ROOT, "frontend", "parser", "parsetab.py"),
+)
+SOURCE = "int main() {\n    return 0;\n}\n"
+
+
+def remove_tables():
+    for path in TABLES:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def run(source: str, runs: int, cold: bool = False) -> float:
+    cmd = [sys.executable, os.path.join(ROOT, "main.py"), "--input", source, "--parse"]
+    times = []
+    for _ in range(runs):
+        if cold:
+            remove_tables()
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def tablegen():
+    subprocess.run([sys.executable, "-m", "frontend.tablegen"], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf start-up benchmark")
+    parser.add_argument("-n", type=int, default=20, help="number of runs per configuration")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "main.c")
+        with open(source, "w") as f:
+            f.write(SOURCE)
+
+        try:
+            cold = run(source, max(args.n // 4, 1), cold=True)
+
+            # the last cold run left the tables that ply caches by itself
+            baseline = run(source, args.n)
+
+            tablegen()
+            prebuilt = run(source, args.n)
+        finally:
+            tablegen()
+
+    print(f"cold start:            {cold * 1000:8.1f} ms")
+    print(f"baseline (ply cache):  {baseline * 1000:8.1f} ms")
+    print(f"prebuilt tables:       {prebuilt * 1000:8.1f} ms")
+    print(f"saved:                 {(baseline - prebuilt) * 1000:8.1f} ms ({1 - prebuilt / baseline:.0%})")
+
+
+if __name__ == "__main__":
+    main()
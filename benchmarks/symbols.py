@@ -0,0 +1,86 @@
+"""
+Symbol table benchmark: resolves names in deeply nested blocks with many locals,
+with `ScopeStack` and `ShadowScopeStack`, and checks that both resolve every name to the same symbol.
+
+    python3 benchmarks/symbols.py [--depth N] [--locals N] [--lookups N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frontend.ast.tree  # import the AST modules in the right order
+from frontend.scope.globalscope import GlobalScopeType
+from frontend.scope.scope import Scope, ScopeKind
+from frontend.scope.scopestack import ScopeStack
+from frontend.scope.shadowstack import ShadowScopeStack
+from frontend.symbol.varsymbol import VarSymbol
+from frontend.type import INT
+
+
+def workload(depth: int, locals: int, lookups: int, seed: int = 0) -> list[tuple]:
+    """
+    Operations of a namer on `depth` nested blocks, each of which declares `locals` variables
+    (some of them shadowing outer ones) and then looks up `lookups` names, before the blocks are closed.
+    """
+    rng = random.Random(seed)
+    names = [f"v{i}" for i in range(locals * 4)]
+    ops = []
+    for _ in range(depth):
+        ops.append(("open",))
+        for name in rng.sample(names, locals):
+            ops.append(("declare", name))
+        for _ in range(lookups):
+            # mostly names of outer blocks, like loop counters and parameters
+            ops.append(("lookup", rng.choice(names + ["undefined"])))
+    ops += [("close",)] * depth
+    return ops
+
+
+def run(table_type, ops: list[tuple], depth: int) -> list:
+    table = table_type(GlobalScopeType(), scopeDepth=depth + 1)
+    results = []
+    for op in ops:
+        if op[0] == "open":
+            table.open(Scope(ScopeKind.LOCAL))
+        elif op[0] == "close":
+            table.close()
+        elif op[0] == "declare":
+            if table.findConflict(op[1]) is None:
+                table.declare(VarSymbol(op[1], INT))
+        else:
+            symbol = table.lookup(op[1])
+            results.append(symbol and (symbol.name, id(symbol.domain)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf symbol table benchmark")
+    parser.add_argument("--depth", type=int, default=200)
+    parser.add_argument("--locals", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    ops = workload(args.depth, args.locals, args.lookups)
+    results = {}
+    for table_type in (ScopeStack, ShadowScopeStack):
+        start = time.perf_counter()
+        results[table_type] = run(table_type, ops, args.depth)
+        elapsed = time.perf_counter() - start
+        print(f"{table_type.__name__:>16}: {elapsed:.2f} s")
+
+    # scopes are compared by identity, so compare the shape of the results instead
+    same = [r and r[0] for r in results[ScopeStack]] == [
+        r and r[0] for r in results[ShadowScopeStack]
+    ]
+    print(f"{len(ops)} operations, results {'identical' if same else 'DIFFERENT'}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
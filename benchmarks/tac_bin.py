@@ -0,0 +1,63 @@
+"""
+Binary TAC benchmark: compares the dump time, load time and size of the binary format
+of `utils/tac/binary.py` with pickle and with the textual output of `--tac`, on a huge program.
+
+    python3 benchmarks/tac_bin.py [--statements N]
+"""
+
+import argparse
+import io
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emit import program
+
+import frontend.ast.tree  # import the AST modules in the right order
+from compiler import Compiler
+from utils.tac import binary
+from utils.tac.parser import parse_tac
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def text(tac) -> bytes:
+    out = io.StringIO()
+    tac.print(out)
+    return out.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniDecaf binary TAC benchmark")
+    parser.add_argument("--statements", type=int, default=100000)
+    args = parser.parse_args()
+    sys.setrecursionlimit(100000)
+
+    compiler = Compiler(parser="fast", lexer="fast")
+    tac = compiler.tac(compiler.parse(program(args.statements)))
+
+    formats = {
+        "binary": (binary.dumps, binary.loads),
+        "pickle": (
+            lambda prog: pickle.dumps(prog, pickle.HIGHEST_PROTOCOL),
+            pickle.loads,
+        ),
+        "text": (text, lambda data: parse_tac(data.decode())),
+    }
+    print("%8s %10s %10s %10s" % ("", "dump (s)", "load (s)", "size (MB)"))
+    for name, (dumps, loads) in formats.items():
+        data, dump_time = timed(lambda: dumps(tac))
+        loaded, load_time = timed(lambda: loads(data))
+        assert str(loaded) == str(tac)
+        print("%8s %10.2f %10.2f %10.1f" % (name, dump_time, load_time, len(data) / 1e6))
+
+
+if __name__ == "__main__":
+    main()
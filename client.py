@@ -0,0 +1,49 @@
+"""
+A thin client of the compile daemon, which accepts the same arguments as `main.py`:
+
+    python3 main.py --serve [SOCKET] &
+    python3 client.py [--socket SOCKET] --input <testcase.c or directory>... [--riscv/--tac/--parse]
+
+Besides the standard library, it only imports `utils.daemon`, so it starts much faster than `main.py`.
+"""
+
+import argparse
+import os
+import sys
+from typing import Optional
+
+from utils import daemon
+
+
+def main():
+    # Only the options of the client itself are parsed here; the daemon parses the others like `main.py` does.
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--socket", default=os.environ.get("MINIDECAF_SOCKET", daemon.DEFAULT_SOCKET)
+    )
+    parser.add_argument("--input", nargs="+")
+    known, args = parser.parse_known_args()
+
+    source: Optional[str] = ""
+    if known.input:
+        args += ["--input", *known.input]
+        if len(known.input) > 1 or os.path.isdir(known.input[0]):
+            # a batch, whose files the daemon reads (and writes the outputs of) itself
+            source = None
+        else:
+            try:
+                with open(known.input[0], "r") as f:
+                    source = f.read()
+            except OSError as e:
+                print(f"error: {e}", file=sys.stderr)
+                sys.exit(1)
+
+    # relative paths in the arguments are resolved against the current directory of the client
+    response = daemon.request(known.socket, args, source, os.getcwd())
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["status"])
+
+
+if __name__ == "__main__":
+    main()
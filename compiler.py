@@ -0,0 +1,232 @@
+"""
+Library interface of the compiler:
+
+    from compiler import compile_source
+    asm = compile_source(code, "riscv")
+
+A `Compiler` owns every piece of state of a compilation: its lexer, parser, error stacks, global scope
+and backend passes. Nothing is shared with other compilers except read-only tables,
+so separate compilers can run one after another in the same process, or concurrently in different threads.
+A single `Compiler` must not be used by two threads at the same time.
+"""
+
+import io
+from typing import TYPE_CHECKING, Optional, TextIO, cast
+
+from backend.riscv.entry import ProgramTranslator, backend_passes
+from backend.riscv.misc import AsmCodePrinter
+from backend.riscv.passes.manage import Func2ProgPassConverter
+from backend.riscv.program import NativeProg
+from frontend.ast.tree import Program
+from frontend.lexer import lexers
+from frontend.parser import parsers
+from frontend.passes.fingerprint import function_fingerprints
+from frontend.passes.namer import Namer
+from frontend.passes.tacgen import TACGen
+from frontend.passes.typer import Typer
+from utils.error import DecafSyntaxErrors
+from utils.printtree import TreePrinter
+from utils.tac.program import TACFunc, TACProg
+from utils.timer import NULL_TIMER, PassTimer
+
+if TYPE_CHECKING:
+    from utils.cache import CompileCache
+
+# The stages `compile` can stop at, in pipeline order.
+STAGES = ("parse", "tac", "riscv")
+
+
+class Compiler:
+    def __init__(
+        self,
+        lexer: str = "ply",
+        parser: str = "ply",
+        timer: PassTimer = NULL_TIMER,
+        cache: Optional["CompileCache"] = None,
+        jobs: int = 1,
+        regalloc: str = "local",
+    ) -> None:
+        self.lexer_name = lexer
+        self.parser_name = parser
+        self.timer = timer
+        self.cache = cache
+        # number of processes for the backend
+        self.jobs = jobs
+        # name of the register allocator, see `REG_ALLOCATORS`
+        self.regalloc = regalloc
+
+    # The options that affect the output, as part of cache keys.
+    @property
+    def flags(self) -> tuple[str, ...]:
+        return (self.lexer_name, self.parser_name, self.regalloc)
+
+    # The parser stage: MiniDecaf code -> Abstract syntax tree
+    def parse(self, code: str) -> Program:
+        # A fresh lexer and parser per program, so that no state leaks between programs.
+        lexer = lexers[self.lexer_name]()
+        parser = parsers[self.parser_name]()
+        with self.timer.time("parse"):
+            r = parser.parse(code, lexer=lexer)
+
+        if parser.error_stack:
+            raise DecafSyntaxErrors(parser.error_stack)
+        return r
+
+    # IR generation stage: Abstract syntax tree -> Three-address code
+    def tac(self, p: Program) -> TACProg:
+        timer = self.timer
+        with timer.time("tac"):
+            p = self.check(p)
+            with timer.time("TACGen"):
+                tacgen = TACGen()
+                tac_prog = tacgen.transform(p)
+
+        return tac_prog
+
+    # Semantic analysis, the part of IR generation that needs the whole program
+    def check(self, p: Program) -> Program:
+        timer = self.timer
+        with timer.time("Namer"):
+            namer = Namer()
+            p = namer.transform(p)
+        with timer.time("Typer"):
+            typer = Typer()
+            p = typer.transform(p)
+        return p
+
+    # Target code generation stage: Three-address code -> RISC-V assembly code
+    def asm(self, p: TACProg) -> NativeProg:
+        timer = self.timer
+        with timer.time("asm"):
+            with timer.time("ProgramTranslator"):
+                translator = ProgramTranslator()
+                prog = translator(p)
+
+            for transform in backend_passes(self.regalloc):
+                if isinstance(transform, Func2ProgPassConverter):
+                    with timer.time(transform.name):
+                        prog = transform(prog, timer)
+                else:
+                    with timer.time(type(transform).__name__):
+                        prog = transform(prog)
+        return prog
+
+    def compile(self, code: str, stage: str, file: Optional[TextIO] = None) -> None:
+        "Run the pipeline up to `stage` and print its output to `file` (stdout by default)."
+        if stage not in STAGES:
+            raise ValueError(f"unknown stage {stage!r}, expected one of {STAGES}")
+        if self.cache is None:
+            self.emit(self.parse(code), stage, file)
+            return
+
+        # A hit skips the whole pipeline. Failures are not cached.
+        key = self.cache.key(code, stage, self.flags)
+        output = self.cache.get(key)
+        if output is None:
+            out = io.StringIO()
+            self.emit(self.parse(code), stage, out)
+            output = out.getvalue()
+            self.cache.put(key, output)
+        print(output, end="", file=file)
+
+    def emit(self, prog: Program, stage: str, file: Optional[TextIO] = None) -> None:
+        "Run the rest of the pipeline on a parsed program, and print the output of `stage` to `file`."
+        if stage == "parse":
+            printer = TreePrinter(indent_len=2, file=file)
+            printer.print(prog)
+            return
+
+        if stage == "riscv" and (self.cache is not None or self.jobs > 1):
+            self._compile_functions(prog, file)
+            return
+
+        self.emit_tac(self.tac(prog), stage, file)
+
+    def emit_tac(self, tac: TACProg, stage: str, file: Optional[TextIO] = None) -> None:
+        "Print a TAC program (stage `tac`), or run it through the backend and print the assembly (stage `riscv`)."
+        if stage == "tac":
+            tac.print(file)
+            return
+
+        printer = AsmCodePrinter()
+        if self.jobs > 1:
+            printer.print_funcs(self._generate(tac.funcs), file)
+        else:
+            printer.print(self.asm(tac), file)
+
+    def _compile_functions(self, prog: Program, file: Optional[TextIO]) -> None:
+        """
+        Generate assembly function by function. Functions are independent once TAC has been generated, so:
+            1. With a cache, the assembly of functions whose fingerprints haven't changed is reused,
+                and only the other functions go through TACGen and the backend.
+            2. With `jobs > 1`, the remaining functions go through the backend in worker processes.
+        """
+        timer = self.timer
+        with timer.time("tac"):
+            prog = self.check(prog)
+
+        fingerprints = function_fingerprints(prog) if self.cache is not None else {}
+        tacgen = TACGen()
+        funcs: list[Optional[str]] = []
+        keys: list[str] = []
+        missing: list[TACFunc] = []
+        for name, function in prog.functions().items():
+            asm = None
+            if self.cache is not None:
+                keys.append(self.cache.key(fingerprints[name], "function", self.flags))
+                asm = self.cache.get(keys[-1], "function ")
+            if asm is None:
+                with timer.time("TACGen"):
+                    missing.append(tacgen.transform_function(name, function))
+            funcs.append(asm)
+
+        generated = iter(self._generate(missing))
+        for i, asm in enumerate(funcs):
+            if asm is None:
+                funcs[i] = asm = next(generated)
+                if self.cache is not None:
+                    self.cache.put(keys[i], asm)
+
+        printer = AsmCodePrinter()
+        printer.print_funcs(cast(list[str], funcs), file)
+
+    def _generate(self, tac_funcs: list[TACFunc]) -> list[str]:
+        "Run functions through the backend, and return their assembly in the same order."
+        if self.jobs <= 1 or len(tac_funcs) <= 1:
+            return [str(fn) for fn in self.asm(TACProg(tac_funcs)).funcs]
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Only the whole backend is timed, since the passes run in other processes.
+        jobs = min(self.jobs, len(tac_funcs))
+        with self.timer.time("asm"), ProcessPoolExecutor(jobs) as pool:
+            return list(
+                pool.map(
+                    generate_function,
+                    tac_funcs,
+                    [self.regalloc] * len(tac_funcs),
+                    chunksize=max(1, len(tac_funcs) // (jobs * 4)),
+                )
+            )
+
+
+def generate_function(tac_func: TACFunc, regalloc: str = "local") -> str:
+    "Run a single function through the backend. This is what backend worker processes do."
+    return str(Compiler(regalloc=regalloc).asm(TACProg([tac_func])).funcs[0])
+
+
+def compile_source(
+    code: str,
+    stage: str = "riscv",
+    lexer: str = "ply",
+    parser: str = "ply",
+    cache: Optional["CompileCache"] = None,
+    regalloc: str = "local",
+) -> str:
+    """
+    Compile a MiniDecaf program up to `stage` and return the output.
+    Raises `DecafSyntaxErrors` on syntax errors, or the semantic error of the program.
+    """
+    out = io.StringIO()
+    Compiler(lexer, parser, cache=cache, regalloc=regalloc).compile(code, stage, out)
+    return out.getvalue()
@@ -10,6 +10,7 @@ from abc import ABC, abstractmethod
 from enum import Enum, unique
 from typing import Any, Optional, TypeVar
 
+from .traversal import fold, visit
 from .visitor import Visitor
 
 _T = TypeVar("_T", bound=Enum)
@@ -87,35 +88,67 @@ it's no need to make a enumeration for it.
 """
 
 
+# Annotations that are stored in slots of every node, instead of the `_attrs` dict.
+_ANNOTATIONS = frozenset(("symbol", "val", "type"))
+
+
+def _index_len_err(i: int, node: Node):
+    return IndexError(
+        f"you are trying to index the #{i} child of node {node.name}, which has only {len(node)} children"
+    )
+
+
 class Node(ABC):
     """
     Base class of all AST nodes.
+
+    Nodes use `__slots__` to stay small, so every subclass must declare the `__slots__` of its own fields.
     """
 
+    __slots__ = ("name", "symbol", "val", "type", "_attrs")
+
+    # Names of the fields that hold the children, in order.
+    # `__len__`, `__getitem__` and `__iter__` are derived from it.
+    _fields: tuple[str, ...] = ()
+
     def __init__(self, name: str) -> None:
         """Constructor.
         `name`: name of this kind of node. Used when represents the node by a string.
-        `_attrs`: used to store additional information on AST nodes.
+        `symbol`, `val`, `type`: common annotations on AST nodes.
+        `_attrs`: used to store other additional information on AST nodes, created on demand.
         """
         self.name = name
-        self._attrs = dict[str, Any]()
+        self._attrs: Optional[dict[str, Any]] = None
 
-    @abstractmethod
     def __len__(self) -> int:
         """Returns its children count."""
-        raise NotImplementedError
+        return len(self._fields)
 
-    @abstractmethod
     def __getitem__(self, key: int) -> Node:
         """
         Get one of its children by index.
         Not that children of a AST node are always AST nodes.
         """
-        raise NotImplementedError
+        try:
+            field = self._fields[key]
+        except IndexError:
+            raise _index_len_err(key, self) from None
+        return getattr(self, field)
 
-    @abstractmethod
     def accept(self, v: Visitor[T, U], ctx: T) -> Optional[U]:
-        """Dispatcher method used along with a `Visitor`."""
+        """
+        Visit this node and its descendants with a `Visitor`, and return the result of visiting this node.
+        Visit methods that yield their children are driven to completion, so calling `child.accept(self, ctx)`
+        from a visit method works too (but recurses, unlike yielding `child`).
+        """
+        return visit(v, self, ctx)
+
+    @abstractmethod
+    def dispatch(self, v: Visitor[T, U], ctx: T) -> Optional[U]:
+        """
+        Call the visit method of `v` for this kind of node. It may return a generator that yields the children
+        to visit, see `traversal.visit`.
+        """
         raise NotImplementedError
 
     def is_leaf(self):
@@ -123,19 +156,26 @@ class Node(ABC):
 
     def setattr(self, name: str, value: Any):
         """Set additional information on AST node."""
-        self._attrs[name] = value
+        if name in _ANNOTATIONS:
+            setattr(self, name, value)
+        else:
+            if self._attrs is None:
+                self._attrs = {}
+            self._attrs[name] = value
 
     def getattr(self, name: str) -> Any:
         """
         Get additional information on AST node.
         Note that the default return value is `None` when the given name is not present.
         """
-        return self._attrs.get(name, None)
+        if name in _ANNOTATIONS:
+            return getattr(self, name, None)
+        return self._attrs.get(name, None) if self._attrs else None
 
     def __iter__(self):
         """Iterates its children."""
-        for i in range(0, len(self)):
-            yield self[i]
+        for field in self._fields:
+            yield getattr(self, field)
 
     def __bool__(self):
         """
@@ -146,15 +186,19 @@ class Node(ABC):
 
     def __str__(self) -> str:
         """
-        Recursively stringify itself and its children.
-        Override this method when necesssary.
+        Stringify itself and its children, without recursion.
+        Override `_str` instead of this method when necesssary.
         """
-        if len(self) == 0:
+        return fold(self, _stringify)
+
+    def _str(self, children: list[str]) -> str:
+        """Stringify itself, given the strings of its children."""
+        if not children:
             return self.name
 
         return "{}[{}]".format(
             self.name,
-            ", ".join(map(str, self)),
+            ", ".join(children),
         )
 
     def __repr__(self) -> str:
@@ -167,24 +211,24 @@ class NullType(Node):
     You can take `If` in `.tree` as an example.
     """
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__("NULL")
 
-    def __getitem__(self, key: int) -> Node:
-        return super().__getitem__(key)
-
-    def __len__(self) -> int:
-        return 0
-
     def __bool__(self):
         return False
 
-    def accept(self, v: Visitor[T, U], ctx: T) -> Optional[U]:
+    def dispatch(self, v: Visitor[T, U], ctx: T) -> Optional[U]:
         return v.visit_null(self, ctx)
 
     def is_leaf(self):
         return True
 
 
+def _stringify(node: Node, children: list[str]) -> str:
+    return node._str(children)
+
+
 "This should be the only instance of NullType."
 NULL = NullType()
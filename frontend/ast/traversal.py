@@ -0,0 +1,97 @@
+"""
+Module that drives traversals of the AST with an explicit stack instead of Python recursion,
+so that arbitrarily deep trees (e.g. long `else if` chains) don't hit the recursion limit.
+
+There are three drivers:
+    1. `walk`: calls `pre` and `post` callbacks on every node, in pre-order and post-order.
+    2. `fold`: computes a value for every node from the values of its children (post-order).
+    3. `visit`: runs a `Visitor` on a tree. A visit method visits a child by yielding it:
+
+        def visit_binary(self, expr: Binary, ctx: T) -> Generator:
+            lhs = yield expr.lhs  # the result of visiting `expr.lhs`
+            rhs = yield expr.rhs
+            return ...
+
+    A visit method that doesn't yield is called like a normal function.
+
+The drivers only rely on nodes being iterable over their children, and on `dispatch`.
+"""
+
+from __future__ import annotations
+
+from types import GeneratorType
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+N = TypeVar("N")
+R = TypeVar("R")
+
+_END = object()
+
+
+def walk(
+    root: N,
+    pre: Optional[Callable[[N], Optional[bool]]] = None,
+    post: Optional[Callable[[N], None]] = None,
+    children: Callable[[N], Iterable[N]] = iter,
+) -> None:
+    """
+    Traverse the tree in depth-first order.
+    If `pre` returns False for a node, its children and its `post` call are skipped.
+    """
+    if pre is not None and pre(root) is False:
+        return
+
+    stack: list[tuple[N, Iterator[N]]] = [(root, iter(children(root)))]
+    while stack:
+        node, it = stack[-1]
+        for child in it:
+            if pre is None or pre(child) is not False:
+                stack.append((child, iter(children(child))))
+                break
+        else:
+            stack.pop()
+            if post is not None:
+                post(node)
+
+
+def fold(root: N, leave: Callable[[N, list[R]], R]) -> R:
+    "Compute `leave(node, values of its children)` for every node, and return the value of the root."
+    stack: list[tuple[N, Iterator[N]]] = [(root, iter(root))]  # type: ignore
+    values: list[list[R]] = [[]]
+    while True:
+        node, it = stack[-1]
+        child = next(it, _END)
+        if child is not _END:
+            stack.append((child, iter(child)))  # type: ignore
+            values.append([])
+            continue
+
+        stack.pop()
+        value = leave(node, values.pop())
+        if not stack:
+            return value
+        values[-1].append(value)
+
+
+def visit(visitor: Any, root: Any, ctx: Any) -> Any:
+    "Run a visitor on a tree, and return the result of visiting the root."
+    result = root.dispatch(visitor, ctx)
+    if not isinstance(result, GeneratorType):
+        return result
+
+    # generators of the visits in progress; the top one is waiting for `result`
+    stack = [result]
+    result = None
+    while stack:
+        try:
+            child = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value
+            continue
+
+        result = child.dispatch(visitor, ctx)
+        if isinstance(result, GeneratorType):
+            stack.append(result)
+            result = None
+    return result
@@ -12,36 +12,39 @@ from frontend.type import INT, DecafType
 from utils import T, U
 
 from .node import NULL, BinaryOp, Node, UnaryOp
-from .visitor import Visitor, accept
+from .visitor import Visitor
 
 _T = TypeVar("_T", bound=Node)
 U = TypeVar("U", covariant=True)
 
 
-def _index_len_err(i: int, node: Node):
-    return IndexError(
-        f"you are trying to index the #{i} child of node {node.name}, which has only {len(node)} children"
-    )
-
-
 class ListNode(Node, Generic[_T]):
     """
     Abstract node type that represents a node sequence.
     E.g. `Block` (sequence of statements).
     """
 
+    __slots__ = ("children",)
+
     def __init__(self, name: str, children: list[_T]) -> None:
         super().__init__(name)
         self.children = children
 
+    def __iter__(self):
+        return iter(self.children)
+
     def __getitem__(self, key: int) -> Node:
         return self.children.__getitem__(key)
 
     def __len__(self) -> int:
         return len(self.children)
 
-    def accept(self, v: Visitor[T, U], ctx: T):
-        ret = tuple(map(accept(v, ctx), self))
+    def dispatch(self, v: Visitor[T, U], ctx: T):
+        # visits the children through `traversal.visit`
+        ret = []
+        for child in self:
+            ret.append((yield child))
+        ret = tuple(ret)
         return None if ret.count(None) == len(ret) else ret
 
 
@@ -50,13 +53,15 @@ class Program(ListNode["Function"]):
     AST root. It should have only one children before step9.
     """
 
+    __slots__ = ("globalScope",)
+
     def __init__(self, *children: Function) -> None:
         super().__init__("program", list(children))
 
     def functions(self) -> dict[str, Function]:
         return {func.ident.value: func for func in self if isinstance(func, Function)}
 
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_program(self, ctx)
 
 
@@ -65,6 +70,9 @@ class Function(Node):
     AST node that represents a function.
     """
 
+    __slots__ = ("ret_t", "ident", "body")
+    _fields = __slots__
+
     def __init__(
         self,
         ret_t: TypeLiteral,
@@ -76,17 +84,7 @@ class Function(Node):
         self.ident = ident
         self.body = body
 
-    def __getitem__(self, key: int) -> Node:
-        return (
-            self.ret_t,
-            self.ident,
-            self.body,
-        )[key]
-
-    def __len__(self) -> int:
-        return 3
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_function(self, ctx)
 
 
@@ -95,6 +93,8 @@ class Statement(Node):
     Abstract type that represents a statement.
     """
 
+    __slots__ = ()
+
     def is_block(self) -> bool:
         """
         Determine if this type of statement is `Block`.
@@ -107,19 +107,19 @@ class Return(Statement):
     AST node of return statement.
     """
 
+    __slots__ = ("expr",)
+    _fields = __slots__
+
     def __init__(self, expr: Expression) -> None:
         super().__init__("return")
         self.expr = expr
 
     def __getitem__(self, key: Union[int, str]) -> Node:
         if isinstance(key, int):
-            return (self.expr,)[key]
-        return self.__dict__[key]
-
-    def __len__(self) -> int:
-        return 1
+            return super().__getitem__(key)
+        return getattr(self, key)
 
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_return(self, ctx)
 
 
@@ -128,6 +128,9 @@ class If(Statement):
     AST node of if statement.
     """
 
+    __slots__ = ("cond", "then", "otherwise")
+    _fields = __slots__
+
     def __init__(
         self, cond: Expression, then: Statement, otherwise: Optional[Statement] = None
     ) -> None:
@@ -136,13 +139,7 @@ class If(Statement):
         self.then = then
         self.otherwise = otherwise or NULL
 
-    def __getitem__(self, key: int) -> Node:
-        return (self.cond, self.then, self.otherwise)[key]
-
-    def __len__(self) -> int:
-        return 3
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_if(self, ctx)
 
 
@@ -151,18 +148,15 @@ class While(Statement):
     AST node of while statement.
     """
 
+    __slots__ = ("cond", "body")
+    _fields = __slots__
+
     def __init__(self, cond: Expression, body: Statement) -> None:
         super().__init__("while")
         self.cond = cond
         self.body = body
 
-    def __getitem__(self, key: int) -> Node:
-        return (self.cond, self.body)[key]
-
-    def __len__(self) -> int:
-        return 2
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_while(self, ctx)
 
 
@@ -171,16 +165,12 @@ class Break(Statement):
     AST node of break statement.
     """
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__("break")
 
-    def __getitem__(self, key: int) -> Node:
-        raise _index_len_err(key, self)
-
-    def __len__(self) -> int:
-        return 0
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_break(self, ctx)
 
     def is_leaf(self):
@@ -192,10 +182,12 @@ class Block(Statement, ListNode[Union["Statement", "Declaration"]]):
     AST node of block "statement".
     """
 
+    __slots__ = ()
+
     def __init__(self, *children: Union[Statement, Declaration]) -> None:
         super().__init__("block", list(children))
 
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_block(self, ctx)
 
     def is_block(self) -> bool:
@@ -207,6 +199,9 @@ class Declaration(Node):
     AST node of declaration.
     """
 
+    __slots__ = ("var_t", "ident", "init_expr")
+    _fields = __slots__
+
     def __init__(
         self,
         var_t: TypeLiteral,
@@ -218,13 +213,7 @@ class Declaration(Node):
         self.ident = ident
         self.init_expr = init_expr or NULL
 
-    def __getitem__(self, key: int) -> Node:
-        return (self.var_t, self.ident, self.init_expr)[key]
-
-    def __len__(self) -> int:
-        return 3
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_declaration(self, ctx)
 
 
@@ -233,6 +222,8 @@ class Expression(Node):
     Abstract type that represents an evaluable expression.
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str) -> None:
         super().__init__(name)
         self.type: Optional[DecafType] = None
@@ -244,24 +235,21 @@ class Unary(Expression):
     Note that the operation type (like negative) is not among its children.
     """
 
+    __slots__ = ("op", "operand")
+    _fields = ("operand",)
+
     def __init__(self, op: UnaryOp, operand: Expression) -> None:
         super().__init__(f"unary({op.value})")
         self.op = op
         self.operand = operand
 
-    def __getitem__(self, key: int) -> Node:
-        return (self.operand,)[key]
-
-    def __len__(self) -> int:
-        return 1
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_unary(self, ctx)
 
-    def __str__(self) -> str:
+    def _str(self, children: list[str]) -> str:
         return "{}({})".format(
             self.op.value,
-            self.operand,
+            *children,
         )
 
 
@@ -271,39 +259,39 @@ class Binary(Expression):
     Note that the operation type (like plus or subtract) is not among its children.
     """
 
+    __slots__ = ("lhs", "op", "rhs")
+    _fields = ("lhs", "rhs")
+
     def __init__(self, op: BinaryOp, lhs: Expression, rhs: Expression) -> None:
         super().__init__(f"binary({op.value})")
         self.lhs = lhs
         self.op = op
         self.rhs = rhs
 
-    def __getitem__(self, key: int) -> Node:
-        return (self.lhs, self.rhs)[key]
-
-    def __len__(self) -> int:
-        return 2
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_binary(self, ctx)
 
-    def __str__(self) -> str:
+    def _str(self, children: list[str]) -> str:
+        lhs, rhs = children
         return "({}){}({})".format(
-            self.lhs,
+            lhs,
             self.op.value,
-            self.rhs,
+            rhs,
         )
 
 
 class Assignment(Binary):
     """
     AST node of assignment expression.
-    It's actually a kind of binary expression, but it'll make things easier if we use another accept method to handle it.
+    It's actually a kind of binary expression, but it'll make things easier if we use another visit method to handle it.
     """
 
+    __slots__ = ()
+
     def __init__(self, lhs: Identifier, rhs: Expression) -> None:
         super().__init__(BinaryOp.Assign, lhs, rhs)
 
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_assignment(self, ctx)
 
 
@@ -312,6 +300,9 @@ class ConditionExpression(Expression):
     AST node of condition expression (`?:`).
     """
 
+    __slots__ = ("cond", "then", "otherwise")
+    _fields = __slots__
+
     def __init__(
         self, cond: Expression, then: Expression, otherwise: Expression
     ) -> None:
@@ -322,21 +313,14 @@ class ConditionExpression(Expression):
 
     def __getitem__(self, key: Union[int, str]) -> Node:
         if isinstance(key, int):
-            return (self.cond, self.then, self.otherwise)[key]
-        return self.__dict__[key]
-
-    def __len__(self) -> int:
-        return 3
+            return super().__getitem__(key)
+        return getattr(self, key)
 
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_cond_expr(self, ctx)
 
-    def __str__(self) -> str:
-        return "({})?({}):({})".format(
-            self.cond,
-            self.then,
-            self.otherwise,
-        )
+    def _str(self, children: list[str]) -> str:
+        return "({})?({}):({})".format(*children)
 
 
 class Identifier(Expression):
@@ -344,20 +328,16 @@ class Identifier(Expression):
     AST node of identifier "expression".
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value: str) -> None:
         super().__init__("identifier")
         self.value = value
 
-    def __getitem__(self, key: int) -> Node:
-        raise _index_len_err(key, self)
-
-    def __len__(self) -> int:
-        return 0
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_identifier(self, ctx)
 
-    def __str__(self) -> str:
+    def _str(self, children: list[str]) -> str:
         return f"identifier({self.value})"
 
     def is_leaf(self):
@@ -369,20 +349,16 @@ class IntLiteral(Expression):
     AST node of int literal like `0`.
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value: Union[int, str]) -> None:
         super().__init__("int_literal")
         self.value = int(value)
 
-    def __getitem__(self, key: int) -> Node:
-        raise _index_len_err(key, self)
-
-    def __len__(self) -> int:
-        return 0
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_int_literal(self, ctx)
 
-    def __str__(self) -> str:
+    def _str(self, children: list[str]) -> str:
         return f"int({self.value})"
 
     def is_leaf(self):
@@ -394,11 +370,13 @@ class TypeLiteral(Node):
     Abstract node type that represents a type literal like `int`.
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str, _type: DecafType) -> None:
         super().__init__(name)
         self.type = _type
 
-    def __str__(self) -> str:
+    def _str(self, children: list[str]) -> str:
         return f"type({self.type})"
 
     def is_leaf(self):
@@ -408,14 +386,10 @@ class TypeLiteral(Node):
 class TInt(TypeLiteral):
     "AST node of type `int`."
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__("type_int", INT)
 
-    def __getitem__(self, key: int) -> Node:
-        raise _index_len_err(key, self)
-
-    def __len__(self) -> int:
-        return 0
-
-    def accept(self, v: Visitor[T, U], ctx: T):
+    def dispatch(self, v: Visitor[T, U], ctx: T):
         return v.visit_tint(self, ctx)
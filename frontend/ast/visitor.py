@@ -1,5 +1,13 @@
 """
 Module that defines the base type of visitor.
+
+Run a visitor with `traversal.visit(visitor, node, ctx)` (or `node.accept(visitor, ctx)`).
+
+A visit method visits a child in one of two ways, and gets the result of visiting it:
+    1. `result = yield child`: the child is visited by the driver of `traversal.visit`, on an explicit stack,
+        so deep trees need no recursion. This is what the passes of this compiler do.
+    2. `result = child.accept(self, ctx)`: the child is visited right away, through a recursive call.
+Both can be mixed, even in the same method.
 """
 
 
@@ -76,5 +84,8 @@ class Visitor(Protocol[T, U]):  # type: ignore
 
 class RecursiveVisitor(Visitor[T, U]):
     def visit_other(self, node: Node, ctx: T) -> Optional[Sequence[Optional[U]]]:
-        ret = tuple(map(accept(self, ctx), node))
+        ret = []
+        for child in node:
+            ret.append((yield child))
+        ret = tuple(ret)
         return ret if ret and ret.count(None) == len(ret) else None
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Iterator, Protocol, Union
+from typing import Callable, Iterator, Protocol, Union
 
 import frontend.ast.node as node
 from utils.error import DecafLexError
@@ -10,6 +10,9 @@ from . import lex
 # * replace the '.ply-lexer' by '.xxx' to use your own-defined lexer, where 'xxx' is the module/package name of it
 # * note that your lexer should be iterable, and should have the method 'input' in order to accept the input source file
 from .ply_lexer import lexer as ply_lexer
+from .ply_lexer import new_lexer as _new_ply_lexer
+from .fast_lexer import FastLexer
+from .fast_lexer import lexer as fast_lexer
 
 
 class LexToken(Protocol):
@@ -50,10 +53,19 @@ class Lexer(Protocol):
 
 lexer: Lexer = ply_lexer
 
+# all available lexers, selected by `--lexer` in `main.py`.
+# Each entry creates a new lexer, so that every compilation owns its lexer state.
+lexers: dict[str, Callable[[], Lexer]] = {
+    "ply": _new_ply_lexer,
+    "fast": FastLexer,
+}
+
 __all__ = [
     "lexer",
     "lex",
     "LexToken",
     "Lexer",
     "ply_lexer",
+    "fast_lexer",
+    "lexers",
 ]
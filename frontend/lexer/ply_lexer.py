@@ -9,6 +9,7 @@ from typing import List
 import ply.lex as lex
 
 from frontend.ast import tree
+from frontend.tablegen import LEXTAB, lexer_signature, load_table
 from utils.error import DecafLexError
 
 from .lex import *
@@ -37,7 +38,7 @@ def t_ANY_Newline(t):
 
 
 def t_ANY_error(t):
-    error_stack.append(DecafLexError(t))
+    t.lexer.error_stack.append(DecafLexError(t))
     t.lexer.skip(1)
 
 
@@ -67,5 +68,19 @@ def _intlit_into_node(f):
 
 t_Integer = _intlit_into_node(t_Integer)
 
-lexer = lex.lex()
+# Load the prebuilt master regex if it's up to date (see `frontend.tablegen`).
+_lextab = load_table(LEXTAB, lexer_signature(globals()))
+if _lextab is not None:
+    lexer = lex.lex(optimize=True, lextab=_lextab)
+else:
+    lexer = lex.lex()
 lexer.error_stack = error_stack  # type: ignore
+
+
+def new_lexer() -> lex.Lexer:
+    "Create an independent lexer with its own state and error stack, sharing the tables of `lexer`."
+    clone = lexer.clone()
+    clone.begin("INITIAL")
+    clone.lineno = 1
+    clone.error_stack = []  # type: ignore
+    return clone
@@ -1,9 +1,11 @@
-from typing import Optional, Protocol, cast
+from typing import Callable, Optional, Protocol, cast
 
 from frontend.ast.tree import Program
 from frontend.lexer import Lexer
 from utils.error import DecafSyntaxError
 
+from .fast_parser import FastParser
+from .ply_parser import new_parser as _new_ply_parser
 from .ply_parser import parser as _parser
 
 
@@ -17,7 +19,14 @@ class Parser(Protocol):
 
 parser = cast(Parser, _parser)
 
+# all available parsers, selected by `--parser` in `main.py`.
+# Each entry creates a new parser, so that every compilation owns its error stack.
+parsers: dict[str, Callable[[], Parser]] = {
+    "ply": cast(Callable[[], Parser], _new_ply_parser),
+    "fast": FastParser,
+}
 
 __all__ = [
     "parser",
+    "parsers",
 ]
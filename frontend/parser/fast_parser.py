@@ -0,0 +1,347 @@
+"""
+Module that defines a hand-written parser.
+It accepts the same language and builds the same AST as `ply_parser`, but it's much faster on large inputs:
+    1. Statements are parsed by recursive descent.
+    2. Binary expressions are parsed by precedence climbing,
+        so an operand doesn't go through a reduction for every precedence level.
+    3. The descent doesn't recurse in Python: every parsing method is a generator that yields the parsers
+        of the constructs nested in it, and `FastParser.parse` runs them on an explicit stack.
+        So deeply nested input (e.g. thousands of parentheses) doesn't hit the recursion limit, like ply.
+
+Syntax errors are recovered in the same way as `ply_parser.p_error`: the offending token is reported and skipped.
+Errors are detected at the same positions as ply's LALR parser, i.e. right after an operand for an unexpected token,
+or by the enclosing construct for tokens that may end an expression (`)`, `;` and `:`).
+Any change to the grammar in `ply_parser` should be reflected here.
+"""
+
+from typing import Any, Generator, Optional, TypeVar
+
+from frontend.ast.tree import *
+from frontend.lexer import LexToken, Lexer
+from frontend.lexer import lexer as default_lexer
+from utils.error import DecafSyntaxError
+from utils.sourcemap import SourceMap
+
+# Binary operators and their precedences. A larger number binds tighter.
+BINARY_PRECEDENCE = {
+    "Or": 1,
+    "And": 2,
+    "BitOr": 3,
+    "Xor": 4,
+    "BitAnd": 5,
+    "Equal": 6,
+    "NotEqual": 6,
+    "Less": 7,
+    "Greater": 7,
+    "LessEqual": 7,
+    "GreaterEqual": 7,
+    "Plus": 8,
+    "Minus": 8,
+    "Mul": 9,
+    "Div": 9,
+    "Mod": 9,
+}
+
+UNARY_OPERATORS = ("Minus", "BitNot", "Not")
+
+# Tokens that may follow an expression. ply reduces the whole expression before reporting these.
+EXPRESSION_FOLLOW = ("RParen", "Semi", "Colon")
+
+# Tokens that may start an expression.
+EXPRESSION_FIRST = UNARY_OPERATORS + ("Integer", "Identifier", "LParen")
+
+# Tokens that may start or follow a statement.
+STATEMENT_FIRST = EXPRESSION_FIRST + (
+    "If",
+    "While",
+    "Return",
+    "Break",
+    "LBrace",
+    "Semi",
+)
+STATEMENT_FOLLOW = STATEMENT_FIRST + ("Int", "RBrace")
+
+_EOF = "$end"
+
+T = TypeVar("T")
+
+# A parsing method, which yields the parsing methods of nested constructs and receives their results.
+Parse = Generator["Parse[Any]", Any, T]
+
+
+class _Abort(Exception):
+    "Raised when the input ends unexpectedly. ply gives up in this case, so do we."
+
+
+class _EOFToken:
+    type = _EOF
+    value = None
+
+
+class FastParser:
+    def __init__(self, error_stack: Optional[list[DecafSyntaxError]] = None) -> None:
+        self.error_stack = [] if error_stack is None else error_stack
+
+    def parse(self, input: str, lexer: Optional[Lexer] = None) -> Optional[Program]:
+        self.lexer = lexer or default_lexer
+        self.lexer.input(input)
+        self.peeked: Optional[LexToken] = None
+        self.advance()
+
+        try:
+            return self.run(self.program())
+        except _Abort:
+            return None
+
+    def run(self, parse: Parse[T]) -> T:
+        "Run a parsing method, along with the ones it yields, on an explicit stack instead of the Python stack."
+        stack = [parse]
+        result = None
+        while True:
+            try:
+                nested = stack[-1].send(result)
+            except StopIteration as e:
+                stack.pop()
+                if not stack:
+                    return e.value
+                result = e.value
+            else:
+                stack.append(nested)
+                result = None
+
+    # Token management.
+
+    def advance(self) -> None:
+        if self.peeked is not None:
+            self.tok, self.peeked = self.peeked, None
+        else:
+            self.tok = self.lexer.token() or _EOFToken
+
+    def peek(self) -> LexToken:
+        if self.peeked is None:
+            self.peeked = self.lexer.token() or _EOFToken
+        return self.peeked
+
+    def report(self, t: LexToken) -> None:
+        "Report a syntax error at the given token, just like `ply_parser.p_error`."
+        if t is _EOFToken:
+            self.error_stack.append(DecafSyntaxError(None, "EOF"))
+            raise _Abort
+
+        if not hasattr(t, "lexer"):
+            # ply only sets this on tokens built by a function rule
+            t.lexer = self.lexer
+        self.error_stack.append(
+            DecafSyntaxError(t, "\n" + SourceMap.of(t.lexer).line(t.lineno))
+        )
+
+    def error(self) -> None:
+        "Report the current token and skip it."
+        self.report(self.tok)
+        self.advance()
+
+    def expect(self, type: str) -> LexToken:
+        while self.tok.type != type:
+            self.error()
+        t = self.tok
+        self.advance()
+        return t
+
+    # Declarations and statements.
+
+    def program(self) -> Parse[Program]:
+        program = Program((yield self.function()))
+        while self.tok is not _EOFToken:
+            self.error()
+        return program
+
+    def type(self) -> TypeLiteral:
+        self.expect("Int")
+        return TInt()
+
+    def function(self) -> Parse[Function]:
+        ret_t = self.type()
+        ident = self.expect("Identifier").value
+        self.expect("LParen")
+        self.expect("RParen")
+        self.expect("LBrace")
+        body = (yield self.block())
+        self.expect("RBrace")
+        return Function(ret_t, ident, body)
+
+    def block(self) -> Parse[Block]:
+        "Parse block items until a `}` (which is not consumed)."
+        block = Block()
+        while True:
+            type = self.tok.type
+            if type == "RBrace":
+                return block
+            if type == "Int":
+                item = (yield self.declaration())
+                self.expect("Semi")
+            elif type in STATEMENT_FIRST:
+                item = (yield self.statement())
+            else:
+                self.error()
+                continue
+
+            if item is not NULL:
+                block.children.append(item)
+
+    def declaration(self) -> Parse[Declaration]:
+        var_t = self.type()
+        ident = self.expect("Identifier").value
+        while self.tok.type not in ("Assign", "Semi"):
+            self.error()
+        if self.tok.type == "Assign":
+            self.advance()
+            return Declaration(var_t, ident, (yield self.expression()))
+        return Declaration(var_t, ident)
+
+    def statement(self) -> Parse[Statement]:
+        while self.tok.type not in STATEMENT_FIRST:
+            self.error()
+
+        type = self.tok.type
+        if type == "If":
+            return (yield self.if_statement())
+        if type in EXPRESSION_FIRST:
+            expr = (yield self.expression())
+            self.expect("Semi")
+            return expr
+
+        self.advance()
+        if type == "While":
+            self.expect("LParen")
+            cond = (yield self.expression())
+            self.expect("RParen")
+            return While(cond, (yield self.statement()))
+        if type == "Return":
+            expr = (yield self.expression())
+            self.expect("Semi")
+            return Return(expr)
+        if type == "Break":
+            self.expect("Semi")
+            return Break()
+        if type == "LBrace":
+            block = (yield self.block())
+            self.expect("RBrace")
+            return block
+        # empty statement
+        return NULL
+
+    def if_statement(self) -> Parse[If]:
+        "Parse an `if`, along with its `else if` chain without recursion."
+        branches: list[tuple[Expression, Statement]] = []
+        otherwise = None
+        while True:
+            self.advance()  # `if`
+            self.expect("LParen")
+            cond = (yield self.expression())
+            self.expect("RParen")
+            branches.append((cond, (yield self.statement())))
+
+            # Like ply, keep waiting for an `else` until a token that may follow a statement.
+            while self.tok.type != "Else" and self.tok.type not in STATEMENT_FOLLOW:
+                self.error()
+            if self.tok.type != "Else":
+                break
+            self.advance()
+            if self.tok.type != "If":
+                otherwise = (yield self.statement())
+                break
+
+        for cond, then in reversed(branches):
+            otherwise = If(cond, then, otherwise)
+        return otherwise
+
+    # Expressions.
+
+    def expression(self) -> Parse[Expression]:
+        while self.tok.type not in EXPRESSION_FIRST:
+            self.error()
+
+        if self.tok.type == "Identifier":
+            # Like ply, don't decide between an assignment and a conditional
+            # until a token that fits one of them follows the identifier.
+            while True:
+                type = self.peek().type
+                if type == "Assign":
+                    lhs = self.tok.value
+                    self.advance()
+                    self.advance()
+                    return Assignment(lhs, (yield self.expression()))
+                if (
+                    type in BINARY_PRECEDENCE
+                    or type in EXPRESSION_FOLLOW
+                    or type == "Question"
+                ):
+                    break
+                self.report(self.peeked)
+                self.peeked = None
+        return (yield self.conditional())
+
+    def conditional(self) -> Parse[Expression]:
+        cond = (yield self.binary(1))
+        if self.tok.type != "Question":
+            return cond
+        self.advance()
+        then = (yield self.expression())
+        self.expect("Colon")
+        return ConditionExpression(cond, then, (yield self.conditional()))
+
+    def binary(self, min_prec: int) -> Parse[Expression]:
+        # Precedence climbing, with the operators still waiting for their right operands on a stack
+        # rather than in nested calls: (min_prec, lhs, op) of every pending operator.
+        pending: list[tuple[int, Expression, BinaryOp]] = []
+        while True:
+            t = self.tok
+            if t.type == "Integer" or t.type == "Identifier":
+                # (a plain operand, without the detour through `unary`)
+                self.advance()
+                lhs = t.value
+            else:
+                lhs = (yield self.unary())
+            while True:
+                type = self.tok.type
+                prec = BINARY_PRECEDENCE.get(type)
+                if prec is not None and prec >= min_prec:
+                    pending.append((min_prec, lhs, BinaryOp.backward_search(self.tok.value)))
+                    self.advance()
+                    min_prec = prec + 1
+                    break
+                if prec is not None or type in EXPRESSION_FOLLOW or type == "Question":
+                    if not pending:
+                        return lhs
+                    min_prec, left, op = pending.pop()
+                    lhs = Binary(op, left, lhs)
+                else:
+                    self.error()
+
+    def unary(self) -> Parse[Expression]:
+        ops = []
+        while True:
+            t = self.tok
+            type = t.type
+            if type in UNARY_OPERATORS:
+                ops.append(UnaryOp.backward_search(t.value))
+                self.advance()
+            elif type == "Integer" or type == "Identifier":
+                self.advance()
+                expr = t.value
+                break
+            elif type == "LParen":
+                self.advance()
+                expr = (yield self.expression())
+                self.expect("RParen")
+                break
+            else:
+                self.error()
+
+        for op in reversed(ops):
+            expr = Unary(op, expr)
+        return expr
+
+
+error_stack = list[DecafSyntaxError]()
+parser = FastParser(error_stack)
@@ -11,12 +11,18 @@ Refer to https://www.dabeaz.com/ply/ply.html for more details.
 """
 
 
+import copy
+import os
+
 import ply.yacc as yacc
 
 from frontend.ast.tree import *
 from frontend.lexer import lex
+from frontend.tablegen import PARSETAB, load_table, parser_signature
 from utils.error import DecafSyntaxError
+from utils.sourcemap import SourceMap
 
+start = "program"
 tokens = lex.tokens
 error_stack = list[DecafSyntaxError]()
 
@@ -255,16 +261,40 @@ def p_error(t):
     """
     A naive (and possibly erroneous) implementation of error recovering.
     """
+    return recover(parser, t)
+
+
+def recover(parser: yacc.LRParser, t):
+    "Error recovery of `p_error` on the given parser, which owns its error stack."
     if not t:
-        error_stack.append(DecafSyntaxError(t, "EOF"))
+        parser.error_stack.append(DecafSyntaxError(t, "EOF"))
         return
 
-    inp = t.lexer.lexdata
-    error_stack.append(DecafSyntaxError(t, f"\n{inp.splitlines()[t.lineno - 1]}"))
+    parser.error_stack.append(
+        DecafSyntaxError(t, "\n" + SourceMap.of(t.lexer).line(t.lineno))
+    )
 
     parser.errok()
     return parser.token()
 
 
-parser = yacc.yacc(start="program")
+# Load the prebuilt LALR tables if they're up to date (see `frontend.tablegen`).
+# Otherwise ply checks the tables itself, and rebuilds and caches them as usual if they're stale.
+_parsetab = load_table(PARSETAB, parser_signature(globals(), start))
+if _parsetab is not None:
+    parser = yacc.yacc(
+        start=start, tabmodule=_parsetab, optimize=True, debug=False, write_tables=False
+    )
+else:
+    parser = yacc.yacc(
+        start=start, tabmodule=PARSETAB, outputdir=os.path.dirname(__file__), debug=False
+    )
 parser.error_stack = error_stack  # type: ignore
+
+
+def new_parser() -> yacc.LRParser:
+    "Create an independent parser with its own error stack, sharing the LALR tables of `parser`."
+    clone = copy.copy(parser)
+    clone.error_stack = []  # type: ignore
+    clone.errorfunc = lambda t: recover(clone, t)
+    return clone
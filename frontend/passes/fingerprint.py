@@ -0,0 +1,40 @@
+"""
+Fingerprints of functions, used to reuse the generated code of unchanged functions (see `Compiler`).
+
+The fingerprint of a function covers its whole subtree and the signatures of the functions it refers to,
+i.e. everything its generated code depends on once labels are function-local.
+"""
+
+import hashlib
+
+from frontend.ast.node import Node
+from frontend.ast.tree import Function, Identifier, Program
+
+
+def signature(function: Function) -> str:
+    return f"{function.ret_t} {function.ident.value}()"
+
+
+def referenced_names(function: Function) -> set[str]:
+    "Names of all identifiers in the body of a function."
+    names = set()
+    stack: list[Node] = [function.body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Identifier):
+            names.add(node.value)
+        elif isinstance(node, Node):
+            stack.extend(node)
+    return names
+
+
+def function_fingerprints(program: Program) -> dict[str, str]:
+    functions = program.functions()
+    fingerprints = {}
+    for name, function in functions.items():
+        h = hashlib.sha256(str(function).encode())
+        for callee in sorted(referenced_names(function) & functions.keys()):
+            h.update(b"\0")
+            h.update(signature(functions[callee]).encode())
+        fingerprints[name] = h.hexdigest()
+    return fingerprints
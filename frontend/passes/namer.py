@@ -3,14 +3,16 @@ The namer phase: resolve all symbols defined in the abstract syntax tree and sto
 """
 
 
-from typing import Protocol, TypeVar, cast
+from typing import Any, Generator, Protocol, TypeVar, cast
 
 from frontend.ast.node import Node, NullType
+from frontend.ast.traversal import visit
 from frontend.ast.tree import *
 from frontend.ast.visitor import RecursiveVisitor, Visitor
-from frontend.scope.globalscope import GlobalScope
+from frontend.scope.globalscope import GlobalScopeType
 from frontend.scope.scope import Scope, ScopeKind
 from frontend.scope.scopestack import ScopeStack
+from frontend.scope.shadowstack import ShadowScopeStack
 from frontend.symbol.funcsymbol import FuncSymbol
 from frontend.symbol.symbol import Symbol
 from frontend.symbol.varsymbol import VarSymbol
@@ -27,30 +29,31 @@ class Namer(Visitor[ScopeStack, None]):
     # Entry of this phase
     def transform(self, program: Program) -> Program:
         # Global scope. You don't have to consider it until Step 9.
-        program.globalScope = GlobalScope
-        ctx = ScopeStack(program.globalScope)
+        # Every program gets a fresh one, so that compilations don't see each other's symbols.
+        program.globalScope = GlobalScopeType()
+        ctx = ShadowScopeStack(program.globalScope)
 
-        program.accept(self, ctx)
+        visit(self, program, ctx)
         return program
 
-    def visit_program(self, program: Program, ctx: ScopeStack) -> None:
+    def visit_program(self, program: Program, ctx: ScopeStack) -> Generator[Node, Any, None]:
         # Check if the 'main' function is missing
         functions = program.functions()
         if "main" not in functions:
             raise DecafNoMainFuncError
 
-        functions["main"].accept(self, ctx)
+        yield functions["main"]
 
-    def visit_function(self, func: Function, ctx: ScopeStack) -> None:
+    def visit_function(self, func: Function, ctx: ScopeStack) -> Generator[Node, Any, None]:
         # TODO
-        func.body.accept(self, ctx)
+        yield func.body
 
-    def visit_block(self, block: Block, ctx: ScopeStack) -> None:
+    def visit_block(self, block: Block, ctx: ScopeStack) -> Generator[Node, Any, None]:
         for child in block:
-            child.accept(self, ctx)
+            yield child
 
-    def visit_return(self, stmt: Return, ctx: ScopeStack) -> None:
-        stmt.expr.accept(self, ctx)
+    def visit_return(self, stmt: Return, ctx: ScopeStack) -> Generator[Node, Any, None]:
+        yield stmt.expr
 
         """
         def visitFor(self, stmt: For, ctx: ScopeStack) -> None:
@@ -62,18 +65,18 @@ class Namer(Visitor[ScopeStack, None]):
         5. Close the loop and the local scope.
         """
 
-    def visit_if(self, stmt: If, ctx: ScopeStack) -> None:
-        stmt.cond.accept(self, ctx)
-        stmt.then.accept(self, ctx)
+    def visit_if(self, stmt: If, ctx: ScopeStack) -> Generator[Node, Any, None]:
+        yield stmt.cond
+        yield stmt.then
 
         # check if the else branch exists
         if not stmt.otherwise is NULL:
-            stmt.otherwise.accept(self, ctx)
+            yield stmt.otherwise
 
-    def visit_while(self, stmt: While, ctx: ScopeStack) -> None:
-        stmt.cond.accept(self, ctx)
+    def visit_while(self, stmt: While, ctx: ScopeStack) -> Generator[Node, Any, None]:
+        yield stmt.cond
         ctx.openLoop()
-        stmt.body.accept(self, ctx)
+        yield stmt.body
         ctx.closeLoop()
 
         """
@@ -109,12 +112,12 @@ class Namer(Visitor[ScopeStack, None]):
         """
         pass
 
-    def visit_unary(self, expr: Unary, ctx: ScopeStack) -> None:
-        expr.operand.accept(self, ctx)
+    def visit_unary(self, expr: Unary, ctx: ScopeStack) -> Generator[Node, Any, None]:
+        yield expr.operand
 
-    def visit_binary(self, expr: Binary, ctx: ScopeStack) -> None:
-        expr.lhs.accept(self, ctx)
-        expr.rhs.accept(self, ctx)
+    def visit_binary(self, expr: Binary, ctx: ScopeStack) -> Generator[Node, Any, None]:
+        yield expr.lhs
+        yield expr.rhs
 
     def visit_cond_expr(self, expr: ConditionExpression, ctx: ScopeStack) -> None:
         """
@@ -6,8 +6,11 @@ TACGen is an AST visitor and performs high-level transformations.
 TACFuncEmitter handles low-level TAC generation.
 """
 
+from typing import Any, Generator
 
 from frontend.ast import node
+from frontend.ast.node import Node
+from frontend.ast.traversal import visit
 from frontend.ast.tree import *
 from frontend.ast.visitor import Visitor
 from frontend.symbol.varsymbol import VarSymbol
@@ -17,14 +20,16 @@ from utils.tac.program import TACProg, TACFunc, TACBlock
 from utils.tac.temp import Temp
 
 
-# A global label manager (just a counter)
+# A function-local label manager (just a counter)
+# Labels are qualified by the function name, so that the code of a function doesn't depend on other functions.
 class LabelManager:
-    def __init__(self) -> None:
+    def __init__(self, func_name: str) -> None:
+        self.func_name = func_name
         self.num_labels = 0
 
     def new_label(self) -> str:
         self.num_labels += 1
-        return ".L" + str(self.num_labels)
+        return ".L%s.%d" % (self.func_name, self.num_labels)
 
 
 # Translates a minidecaf function into low-level TAC function
@@ -127,7 +132,7 @@ class TACFuncEmitter:
 
 class TACGen(Visitor[TACFuncEmitter, None]):
     def __init__(self) -> None:
-        self.label_man = LabelManager()
+        pass
 
     # Entry of this phase
     # TODO
@@ -136,17 +141,21 @@ class TACGen(Visitor[TACFuncEmitter, None]):
 
         tac_funcs = []
         for func_name, function in program.functions().items():
-            emitter = TACFuncEmitter(self.label_man)
-            function.body.accept(self, emitter)
-            tac_funcs.append(emitter.finish(func_name, 0))
+            tac_funcs.append(self.transform_function(func_name, function))
         return TACProg(tac_funcs)
 
-    def visit_block(self, block: Block, mv: TACFuncEmitter) -> None:
+    # Translate a single function, independently of the others.
+    def transform_function(self, func_name: str, function: Function) -> TACFunc:
+        emitter = TACFuncEmitter(LabelManager(func_name))
+        visit(self, function.body, emitter)
+        return emitter.finish(func_name, 0)
+
+    def visit_block(self, block: Block, mv: TACFuncEmitter) -> Generator[Node, Any, None]:
         for child in block:
-            child.accept(self, mv)
+            yield child
 
-    def visit_return(self, stmt: Return, mv: TACFuncEmitter) -> None:
-        stmt.expr.accept(self, mv)
+    def visit_return(self, stmt: Return, mv: TACFuncEmitter) -> Generator[Node, Any, None]:
+        yield stmt.expr
         mv.emit_return(stmt.expr.getattr("val"))
 
     def visit_break(self, stmt: Break, mv: TACFuncEmitter) -> None:
@@ -176,14 +185,14 @@ class TACGen(Visitor[TACFuncEmitter, None]):
 
     def visit_if(self, stmt: If, mv: TACFuncEmitter) -> None:
         """
-        stmt.cond.accept(self, mv)
+        yield stmt.cond
 
         if stmt.otherwise is NULL:
             skipLabel = mv.freshLabel()
             mv.visitCondBranch(
                 tacinstr.CondBranchOp.BEQ, stmt.cond.getattr("val"), skipLabel
             )
-            stmt.then.accept(self, mv)
+            yield stmt.then
             mv.visitLabel(skipLabel)
         else:
             skipLabel = mv.freshLabel()
@@ -191,10 +200,10 @@ class TACGen(Visitor[TACFuncEmitter, None]):
             mv.visitCondBranch(
                 tacinstr.CondBranchOp.BEQ, stmt.cond.getattr("val"), skipLabel
             )
-            stmt.then.accept(self, mv)
+            yield stmt.then
             mv.visitBranch(exitLabel)
             mv.visitLabel(skipLabel)
-            stmt.otherwise.accept(self, mv)
+            yield stmt.otherwise
             mv.visitLabel(exitLabel)
         """
 
@@ -206,20 +215,20 @@ class TACGen(Visitor[TACFuncEmitter, None]):
         mv.openLoop(breakLabel, loopLabel)
 
         mv.visitLabel(beginLabel)
-        stmt.cond.accept(self, mv)
+        yield stmt.cond
         mv.visitCondBranch(
             tacinstr.CondBranchOp.BEQ, stmt.cond.getattr("val"), breakLabel
         )
 
-        stmt.body.accept(self, mv)
+        yield stmt.body
         mv.visitLabel(loopLabel)
         mv.visitBranch(beginLabel)
         mv.visitLabel(breakLabel)
         mv.closeLoop()
         """
 
-    def visit_unary(self, expr: Unary, mv: TACFuncEmitter) -> None:
-        expr.operand.accept(self, mv)
+    def visit_unary(self, expr: Unary, mv: TACFuncEmitter) -> Generator[Node, Any, None]:
+        yield expr.operand
 
         op = {
             node.UnaryOp.Neg: tacinstr.UnaryOp.NEG,
@@ -229,9 +238,9 @@ class TACGen(Visitor[TACFuncEmitter, None]):
         }[expr.op]
         expr.setattr("val", mv.emit_unary(op, expr.operand.getattr("val")))
 
-    def visit_binary(self, expr: Binary, mv: TACFuncEmitter) -> None:
-        expr.lhs.accept(self, mv)
-        expr.rhs.accept(self, mv)
+    def visit_binary(self, expr: Binary, mv: TACFuncEmitter) -> Generator[Node, Any, None]:
+        yield expr.lhs
+        yield expr.rhs
 
         op = {
             node.BinaryOp.Add: tacinstr.BinaryOp.ADD,
@@ -6,6 +6,7 @@ The typer phase: type check abstract syntax tree.
 from typing import Protocol, TypeVar
 
 from frontend.ast.node import Node
+from frontend.ast.traversal import visit
 from frontend.ast.tree import *
 from frontend.ast.visitor import Visitor
 from frontend.scope.globalscope import GlobalScope
@@ -21,4 +22,7 @@ class Typer(Visitor[ScopeStack, None]):
 
     # Entry of this phase
     def transform(self, program: Program) -> Program:
+        ctx = ScopeStack(program.globalScope)
+
+        visit(self, program, ctx)
         return program
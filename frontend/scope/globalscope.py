@@ -23,6 +23,7 @@ class GlobalScopeType(Scope):
 
 
 """
-You can access global scope via GlobalScope. This should be the only instance of GlobalScopeType.
+The global scope of a program is created by the namer and stored in `Program.globalScope`.
+GlobalScope is only kept for compatibility; the compiler itself never stores symbols in it.
 """
 GlobalScope = GlobalScopeType()
@@ -0,0 +1,63 @@
+"""
+A shadow scope stack is a scope stack with O(1) lookup.
+
+Besides the stack of scopes, it keeps a single dict that maps every name to the stack of its visible bindings,
+innermost last. A binding shadows the ones below it until its scope is closed:
+    open:    push a binding for every symbol already in the scope
+    declare: push a binding for the new symbol
+    close:   pop the bindings of every symbol in the scope
+So `lookup` only looks at the top binding of a name, no matter how many scopes are open.
+
+Symbols must be declared through the stack (not directly into an open scope) to become visible.
+"""
+
+from typing import Optional
+
+from frontend.symbol.symbol import Symbol
+
+from .scope import Scope
+from .scopestack import ScopeStack
+
+
+class ShadowScopeStack(ScopeStack):
+    def __init__(
+        self, globalscope: Scope, scopeDepth: int = ScopeStack.defaultMaxScopeDepth
+    ) -> None:
+        super().__init__(globalscope, scopeDepth)
+        self.bindings: dict[str, list[Symbol]] = {}
+        self._push(globalscope)
+
+    def _push(self, scope: Scope) -> None:
+        bindings = self.bindings
+        for name, symbol in scope.symbols.items():
+            bindings.setdefault(name, []).append(symbol)
+
+    # To open a new scope.
+    def open(self, scope: Scope) -> None:
+        super().open(scope)
+        self._push(scope)
+
+    # To close the current scope.
+    def close(self) -> None:
+        scope = self.stack.pop()
+        bindings = self.bindings
+        for name in scope.symbols:
+            shadowed = bindings[name]
+            shadowed.pop()
+            if not shadowed:
+                del bindings[name]
+
+    # To declare a new symbol in the current scope.
+    def declare(self, symbol: Symbol) -> None:
+        scope = self.currentScope()
+        shadowed = self.bindings.setdefault(symbol.name, [])
+        if scope.containsKey(symbol.name):
+            # redeclaration in the same scope replaces the binding
+            shadowed.pop()
+        scope.declare(symbol)
+        shadowed.append(symbol)
+
+    # To find the symbol via name from top to bottom.
+    def lookup(self, name: str) -> Optional[Symbol]:
+        shadowed = self.bindings.get(name)
+        return shadowed[-1] if shadowed else None
@@ -0,0 +1,128 @@
+"""
+Build step that serializes the ply lexer and parser tables into versioned modules.
+
+Building the LALR tables and the lexer master regex takes most of the compiler's start-up time,
+so we generate them once and load them afterwards:
+
+    python3 -m frontend.tablegen
+
+This writes `frontend/lexer/lextab.py` and `frontend/parser/parsetab.py`.
+Each generated module is stamped with `TABLE_VERSION` and a hash of the lexer rules (for `lextab`)
+or of the `p_*` docstrings and tokens (for `parsetab`).
+A module whose stamp doesn't match the current sources is ignored, and the tables are built in memory instead.
+"""
+
+import hashlib
+import importlib
+import os
+import sys
+from types import ModuleType
+from typing import Any, Optional
+
+# Bump this to invalidate all previously generated tables.
+TABLE_VERSION = 1
+
+LEXTAB = "frontend.lexer.lextab"
+PARSETAB = "frontend.parser.parsetab"
+
+
+def _digest(parts: list[str]) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def lexer_signature(ldict: dict[str, Any]) -> str:
+    """
+    Hash of everything `ply.lex` puts into the lexer tables:
+    token names, lexer states and the pattern of every `t_*` rule.
+    """
+    parts = [repr(ldict.get("tokens")), repr(ldict.get("states"))]
+    for name in sorted(ldict):
+        if not name.startswith("t_"):
+            continue
+        rule = ldict[name]
+        if callable(rule):
+            parts.append(f"{name}={getattr(rule, 'regex', rule.__doc__)}")
+        else:
+            parts.append(f"{name}={rule}")
+    return _digest(parts)
+
+
+def parser_signature(pdict: dict[str, Any], start: str) -> str:
+    """
+    Hash of everything `ply.yacc` puts into the parser tables:
+    the start symbol, token names and the docstring of every `p_*` function.
+    """
+    parts = [start, repr(pdict.get("precedence")), " ".join(pdict["tokens"])]
+    for name in sorted(pdict):
+        if name.startswith("p_") and callable(pdict[name]):
+            parts.append(f"{name}={pdict[name].__doc__}")
+    return _digest(parts)
+
+
+def load_table(name: str, signature: str) -> Optional[ModuleType]:
+    """
+    Import a generated table module.
+    Returns `None` if it doesn't exist or it was generated from different sources.
+    """
+    try:
+        mod = importlib.import_module(name)
+    except ImportError:
+        return None
+
+    if (
+        getattr(mod, "_table_version", None) != TABLE_VERSION
+        or getattr(mod, "_grammar_hash", None) != signature
+    ):
+        return None
+    return mod
+
+
+def _stamp(path: str, signature: str) -> None:
+    with open(path, "a") as f:
+        f.write(f"_table_version = {TABLE_VERSION!r}\n")
+        f.write(f"_grammar_hash = {signature!r}\n")
+
+
+def _forget(name: str) -> str:
+    "Remove a stale table module and return the path it should be written to."
+    sys.modules.pop(name, None)
+    pkg, _, base = name.rpartition(".")
+    path = os.path.join(os.path.dirname(importlib.import_module(pkg).__file__), base + ".py")
+    if os.path.exists(path):
+        os.remove(path)
+    return path
+
+
+def build() -> None:
+    import ply.lex as lex
+    import ply.yacc as yacc
+
+    # NOTE: `frontend.lexer.ply_lexer` is shadowed by the lexer instance exported from `frontend.lexer`,
+    # and `frontend.parser` has to come first to import the AST modules in the right order.
+    ply_parser = importlib.import_module("frontend.parser.ply_parser")
+    ply_lexer = importlib.import_module("frontend.lexer.ply_lexer")
+
+    path = _forget(LEXTAB)
+    lexer = lex.lex(module=ply_lexer)
+    lexer.writetab(LEXTAB, os.path.dirname(path))
+    _stamp(path, lexer_signature(vars(ply_lexer)))
+    print(f"wrote {path}")
+
+    path = _forget(PARSETAB)
+    yacc.yacc(
+        module=ply_parser,
+        start=ply_parser.start,
+        tabmodule=PARSETAB,
+        outputdir=os.path.dirname(path),
+        debug=False,
+    )
+    _stamp(path, parser_signature(vars(ply_parser), ply_parser.start))
+    print(f"wrote {path}")
+
+
+if __name__ == "__main__":
+    build()
@@ -1,26 +1,126 @@
 import argparse
+import io
+import os
 import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from typing import IO, TYPE_CHECKING, Any, Callable, Optional
 
-from backend.riscv.entry import backend_passes, ProgramTranslator
-from backend.riscv.misc import AsmCodePrinter
-
-from frontend.ast.tree import Program
-from frontend.lexer import lexer
-from frontend.parser import parser
-from frontend.passes.tacgen import TACGen
-from frontend.passes.namer import Namer
-from frontend.passes.typer import Typer
-from utils.printtree import TreePrinter
+from backend.riscv.entry import REG_ALLOCATORS
+from compiler import Compiler
+from frontend.lexer import lexers
+from frontend.parser import parsers
+from utils.error import DecafSyntaxErrors
 from utils.tac.program import TACProg
+from utils.timer import PassTimer
+
+# The modules of the daemon, batches, the cache and TAC input/output are imported
+# in the branches that use them, so that a plain compilation doesn't pay for them at start-up.
+if TYPE_CHECKING:
+    from utils.cache import CompileCache
 
 
-def parse_args():
+def parse_args(argv: Optional[list[str]] = None):
     parser = argparse.ArgumentParser(description="MiniDecaf compiler")
-    parser.add_argument("--input", type=str, help="the input C file")
+    parser.add_argument(
+        "--input",
+        type=str,
+        nargs="+",
+        help="the input C file; several files or directories are compiled in a batch (see batch.py)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="number of worker processes for a batch",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        metavar="FILE",
+        help="write the output to FILE instead of stdout (a batch writes next to its inputs)",
+    )
     parser.add_argument("--parse", action="store_true", help="output parsed AST")
     parser.add_argument("--tac", action="store_true", help="output transformed TAC")
     parser.add_argument("--riscv", action="store_true", help="output generated RISC-V")
-    return parser.parse_args()
+    parser.add_argument(
+        "--emit-tac-bin",
+        action="store_true",
+        help="output TAC in the binary format of utils/tac/binary.py",
+    )
+    from_tac = parser.add_mutually_exclusive_group()
+    from_tac.add_argument(
+        "--from-tac",
+        type=str,
+        metavar="FILE",
+        help="read TAC as printed by --tac from FILE instead of compiling --input, and output it with --tac or --riscv",
+    )
+    from_tac.add_argument(
+        "--from-tac-bin",
+        type=str,
+        metavar="FILE",
+        help="like --from-tac, but read binary TAC written by --emit-tac-bin",
+    )
+    parser.add_argument(
+        "--lexer", choices=lexers.keys(), default="ply", help="the lexer to use"
+    )
+    parser.add_argument(
+        "--parser", choices=parsers.keys(), default="ply", help="the parser to use"
+    )
+    parser.add_argument(
+        "--regalloc",
+        choices=REG_ALLOCATORS.keys(),
+        default="local",
+        help="the register allocator to use",
+    )
+    parser.add_argument(
+        "--time-passes",
+        action="store_true",
+        help="print wall time, CPU time and peak memory of every pass to stderr",
+    )
+    parser.add_argument(
+        "--time-report",
+        type=str,
+        metavar="FILE",
+        help="write the statistics of --time-passes to FILE as JSON",
+    )
+    parser.add_argument(
+        "--backend-jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="number of worker processes that run functions through the backend",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        metavar="DIR",
+        default=os.environ.get("MINIDECAF_CACHE"),
+        help="reuse outputs cached in DIR (default: $MINIDECAF_CACHE, no cache if unset)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        metavar="MB",
+        help="size limit of the cache in MiB (default: 256)",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print cache hits and misses to stderr",
+    )
+    parser.add_argument(
+        "--serve",
+        type=str,
+        nargs="?",
+        const="",
+        metavar="SOCKET",
+        help="run as a compile daemon listening on a Unix domain socket (default: /tmp/minidecaf.sock, see client.py)",
+    )
+    return parser.parse_args(argv)
 
 
 def read_code(fileName):
@@ -28,81 +128,174 @@ def read_code(fileName):
         return f.read()
 
 
-# The parser stage: MiniDecaf code -> Abstract syntax tree
-def step_parse(args: argparse.Namespace):
-    code = read_code(args.input)
-    r: Program = parser.parse(code, lexer=lexer)
+# hope all of you happiness
+# enjoy potato chips
+
+
+def is_batch(args: argparse.Namespace) -> bool:
+    inputs = args.input or []
+    return len(inputs) > 1 or any(os.path.isdir(path) for path in inputs)
+
+
+def run(args: argparse.Namespace, code: Optional[str] = None):
+    if args.emit_tac_bin:
+        stage = "tac-bin"
+    elif args.riscv:
+        stage = "riscv"
+    elif args.tac:
+        stage = "tac"
+    elif args.parse:
+        stage = "parse"
+    else:
+        print("No action.")
+        return
+
+    compile_cache = None
+    if args.cache is not None:
+        from utils.cache import DEFAULT_MAX_SIZE, CompileCache
+
+        max_size = DEFAULT_MAX_SIZE if args.cache_size is None else args.cache_size * 1024 * 1024
+        compile_cache = CompileCache(args.cache, max_size)
+
+    from_tac = args.from_tac is not None or args.from_tac_bin is not None
+    if from_tac and stage not in ("tac", "riscv"):
+        print("error: --from-tac and --from-tac-bin need --tac or --riscv", file=sys.stderr)
+        exit(2)
 
-    errors = parser.error_stack
-    if errors:
-        print("\n".join(map(str, errors)), file=sys.stderr)
+    if code is None and is_batch(args):
+        if stage == "tac-bin":
+            print("error: --emit-tac-bin needs a single input", file=sys.stderr)
+            exit(2)
+        from batch import compile_batch
+
+        failures = compile_batch(
+            args.input,
+            stage,
+            args.lexer,
+            args.parser,
+            args.jobs,
+            compile_cache,
+            args.regalloc,
+        )
+        print_stats(args, compile_cache)
+        exit(1 if failures else 0)
+
+    if code is None and not from_tac:
+        code = read_code(args.input[0])
+    timer = PassTimer(enabled=args.time_passes or args.time_report is not None)
+    compiler = Compiler(
+        args.lexer, args.parser, timer, compile_cache, args.backend_jobs, args.regalloc
+    )
+
+    try:
+        if from_tac:
+            tac = load_tac(args, timer)
+            write_output(args.output, lambda out: compiler.emit_tac(tac, stage, out))
+        elif stage == "tac-bin":
+            tac = compiler.tac(compiler.parse(code))
+            write_output(args.output, lambda out: dump_tac(tac, out, timer), "wb")
+        else:
+            write_output(args.output, lambda out: compiler.compile(code, stage, out))
+    except DecafSyntaxErrors as e:
+        print(e, file=sys.stderr)
+        print_stats(args, compile_cache)
         exit(1)
 
-    return r
+    print_stats(args, compile_cache)
+    if args.time_passes:
+        timer.print()
+    if args.time_report is not None:
+        timer.dump(args.time_report)
+
 
+# Write the output to `path`, or to stdout if it is None.
+# The output is written while it is generated, and removed if the compilation fails.
+def write_output(path: Optional[str], write: Callable[[Optional[IO]], None], mode="w"):
+    if path is None:
+        write(None)
+        return
+    from batch import OUTPUT_BUFFER_SIZE
 
-# IR generation stage: Abstract syntax tree -> Three-address code
-def step_tac(p: Program):
-    namer = Namer()
-    p = namer.transform(p)
-    typer = Typer()
-    p = typer.transform(p)
+    try:
+        with open(path, mode, buffering=OUTPUT_BUFFER_SIZE) as f:
+            write(f)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
 
-    tacgen = TACGen()
-    tac_prog = tacgen.transform(p)
 
-    return tac_prog
+# Read the TAC program of --from-tac or --from-tac-bin.
+def load_tac(args: argparse.Namespace, timer: PassTimer) -> TACProg:
+    from utils.tac import binary
+    from utils.tac.parser import parse_tac
 
+    path = args.from_tac if args.from_tac is not None else args.from_tac_bin
+    try:
+        if args.from_tac is not None:
+            with open(path, "r") as f, timer.time("TAC parse"):
+                return parse_tac(f.read())
+        with open(path, "rb") as f, timer.time("TAC load"):
+            return binary.load(f)
+    except ValueError as e:
+        print(f"error: {path}: {e}", file=sys.stderr)
+        exit(1)
 
-# Target code generation stage: Three-address code -> RISC-V assembly code
-def step_asm(p: TACProg):
-    translator = ProgramTranslator()
-    prog = translator(p)
 
-    for transform in backend_passes:
-        prog = transform(prog)
-    return prog
+def dump_tac(tac: TACProg, file: Optional[IO[bytes]], timer: PassTimer):
+    from utils.tac import binary
 
+    if file is None:
+        # binary output bypasses the text layer of stdout, which the daemon's stdout doesn't have
+        file = getattr(sys.stdout, "buffer", None)
+        if file is None:
+            print("error: binary output needs --output here", file=sys.stderr)
+            exit(2)
+    with timer.time("TAC dump"):
+        binary.dump(tac, file)
 
-# hope all of you happiness
-# enjoy potato chips
+
+def print_stats(args: argparse.Namespace, compile_cache: Optional["CompileCache"]):
+    if args.stats:
+        stats = compile_cache.stats() if compile_cache else "cache: disabled"
+        print(stats, file=sys.stderr)
+
+
+# Make the paths of a request absolute, as they are relative to the client and not to the daemon.
+def resolve_paths(args: argparse.Namespace, cwd: str):
+    if args.input is not None:
+        args.input = [os.path.join(cwd, path) for path in args.input]
+    for name in ("output", "from_tac", "from_tac_bin", "time_report", "cache"):
+        path = getattr(args, name)
+        if path is not None:
+            setattr(args, name, os.path.join(cwd, path))
+
+
+# Compile one request of the daemon. See `utils/daemon.py` for the format of requests and responses.
+def handle_request(request: dict[str, Any]) -> dict[str, Any]:
+    stdout, stderr = io.StringIO(), io.StringIO()
+    status = 0
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            args = parse_args(request["args"])
+            resolve_paths(args, request["cwd"])
+            run(args, request["source"])
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            status = 1
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "status": status}
 
 
 def main():
     args = parse_args()
+    if args.serve is not None:
+        from utils import daemon
 
-    def _parse():
-        r = step_parse(args)
-        # print("\nParsed AST:\n")
-        # printer = TreePrinter(indentLen=2)
-        # printer.print(r)
-        return r
-
-    def _tac():
-        tac = step_tac(_parse())
-        # print("\nGenerated TAC:\n")
-        # tac.printTo()
-        return tac
-
-    def _asm():
-        asm = step_asm(_tac())
-        # print("\nGenerated ASM:\n")
-        # print(asm)
-        return asm
-
-    if args.riscv:
-        prog = _asm()
-        printer = AsmCodePrinter()
-        printer.print(prog)
-    elif args.tac:
-        prog = _tac()
-        prog.print()
-    elif args.parse:
-        prog = _parse()
-        printer = TreePrinter(indent_len=2)
-        printer.print(prog)
+        daemon.serve(args.serve or daemon.DEFAULT_SOCKET, handle_request)
     else:
-        print("No action.")
+        run(args)
 
 
 if __name__ == "__main__":
@@ -1 +1,2 @@
 pip3 install -r requirements.txt
+python3 -m frontend.tablegen
@@ -29,16 +29,6 @@ def try_else(job, onSucceed, onFail):
         return onSucceed(ret)
 
 
-def find_column(_input: str, lexpos: int):
-    line_start = _input.rfind("\n", 0, lexpos)
-    return lexpos - line_start
-
-
-def get_line(_input: str, lineno: int):
-    lines = get_line.__dict__.setdefault(_input, _input.splitlines())
-    return lines[lineno - 1]
-
-
 def get_grammar(path: Optional[str] = None):
     import re
 
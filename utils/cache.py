@@ -0,0 +1,135 @@
+"""
+Content-addressed on-disk cache of compiler outputs, enabled by `main.py --cache DIR`.
+
+An entry is keyed by a hash of the source text, the stage, the flags that affect the output
+and a fingerprint of the compiler's own source files, so editing the compiler invalidates every entry.
+Besides whole programs, the compiler stores the assembly of single functions keyed by their fingerprints.
+
+Entries are spread over 256 subdirectories by the first two hex digits of their keys.
+Each subdirectory holds at most 1/256 of the size limit: after a store, only that subdirectory is trimmed,
+by removing its least recently used entries (a hit refreshes the modification time of its entry).
+Entries are written to a temporary file and renamed into place, so concurrent compilers may share a cache.
+"""
+
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from functools import cache
+from typing import Optional, Sequence
+
+# the default size limit, in bytes
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+_SUBDIRS = 256
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the sources that make up the compiler, relative to the root of the repository
+_SOURCES = ("compiler.py", "frontend", "backend", "utils")
+
+# generated by `frontend.tablegen`; they don't change the output
+_GENERATED = ("lextab.py", "parsetab.py")
+
+
+@cache
+def compiler_fingerprint() -> str:
+    "Hash of every Python source file of the compiler."
+    h = hashlib.sha256()
+    for source in _SOURCES:
+        path = os.path.join(_ROOT, source)
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = []
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+                files += [
+                    os.path.join(root, name)
+                    for name in sorted(names)
+                    if name.endswith(".py") and name not in _GENERATED
+                ]
+        for file in files:
+            h.update(os.path.relpath(file, _ROOT).encode())
+            h.update(b"\0")
+            with open(file, "rb") as f:
+                h.update(f.read())
+            h.update(b"\0")
+    return h.hexdigest()
+
+
+class CompileCache:
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        # "hits" and "misses" of whole programs; "function hits" and "function misses" of single functions
+        self.counts = Counter[str]()
+
+    def key(self, code: str, stage: str, flags: Sequence[str] = ()) -> str:
+        h = hashlib.sha256()
+        for part in (compiler_fingerprint(), stage, *flags, code):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str, kind: str = "") -> Optional[str]:
+        "Look up an entry, counting a hit or a miss of the given kind."
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                output = f.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            # also when another process evicts the entry in the meantime
+            self.counts[kind + "misses"] += 1
+            return None
+        self.counts[kind + "hits"] += 1
+        return output
+
+    def put(self, key: str, output: str) -> None:
+        subdir = os.path.dirname(self._path(key))
+        os.makedirs(subdir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=subdir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(output)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._trim(subdir)
+
+    def _trim(self, subdir: str) -> None:
+        "Remove the least recently used entries of a subdirectory until it fits in its share of the limit."
+        entries = []
+        total = 0
+        for entry in os.scandir(subdir):
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total += stat.st_size
+
+        limit = self.max_size // _SUBDIRS
+        entries.sort()
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> str:
+        counts = self.counts
+        s = f"cache: {counts['hits']} hits, {counts['misses']} misses"
+        if counts["function hits"] or counts["function misses"]:
+            s += f"; functions: {counts['function hits']} hits, {counts['function misses']} misses"
+        return s
@@ -0,0 +1,76 @@
+"""
+The protocol between the compile daemon (`main.py --serve`) and its client (`client.py`).
+
+The daemon listens on a Unix domain socket. Every connection carries exactly one request and one response,
+both of which are JSON objects prefixed by their length (4 bytes, big endian):
+    request:  {"args": [command line arguments], "source": MiniDecaf source code, or null for a batch of inputs,
+               "cwd": directory that relative paths in the arguments are relative to}
+    response: {"stdout": str, "stderr": str, "status": exit status}
+
+This module must stay cheap to import, since the client imports nothing else.
+"""
+
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+from typing import Any, Callable, Optional
+
+DEFAULT_SOCKET = "/tmp/minidecaf.sock"
+
+_HEADER = struct.Struct("!I")
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed unexpectedly")
+        buf += chunk
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, message: dict[str, Any]) -> None:
+    data = json.dumps(message).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock: socket.socket) -> dict[str, Any]:
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+def serve(path: str, handle: Callable[[dict[str, Any]], dict[str, Any]]) -> None:
+    "Serve requests one by one until interrupted."
+    if os.path.exists(path):
+        os.unlink(path)
+    # clean up the socket on `kill` as well
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path)
+        server.listen()
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    send_message(conn, handle(recv_message(conn)))
+                except (ConnectionError, ValueError):
+                    # a broken client shouldn't bring down the daemon
+                    continue
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.unlink(path)
+
+
+def request(path: str, args: list[str], source: Optional[str], cwd: str) -> dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        send_message(sock, {"args": args, "source": source, "cwd": cwd})
+        return recv_message(sock)
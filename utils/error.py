@@ -1,12 +1,13 @@
 from typing import Optional, Union
 
-from utils import find_column
+from utils.sourcemap import SourceMap
 
 
 class DecafLexError(Exception):
     def __init__(self, t) -> None:
+        _, column = SourceMap.of(t.lexer).position(t.lexpos)
         super().__init__(
-            f"Lex error: invalid token at line {t.lineno}, column {find_column(t.lexer.lexdata, t.lexpos)}"
+            f"Lex error: invalid token at line {t.lineno}, column {column}"
         )
         self.token = t
 
@@ -14,16 +15,22 @@ class DecafLexError(Exception):
 class DecafSyntaxError(Exception):
     def __init__(self, t, extra: Optional[str] = None) -> None:
         if t is not None:
-            msg = (
-                f"Syntax error: line {t.lineno}, column {find_column(t.lexer.lexdata, t.lexpos)}"
-                + (extra or "")
-            )
+            _, column = SourceMap.of(t.lexer).position(t.lexpos)
+            msg = f"Syntax error: line {t.lineno}, column {column}" + (extra or "")
         else:
             msg = f"Syntax error: " + (extra or "")
         super().__init__(msg)
         self.token = t
 
 
+class DecafSyntaxErrors(Exception):
+    "All syntax errors of a program, raised by `Compiler.parse`."
+
+    def __init__(self, errors: list[DecafSyntaxError]) -> None:
+        super().__init__("\n".join(map(str, errors)))
+        self.errors = errors
+
+
 class DecafNoMainFuncError(Exception):
     def __init__(self) -> None:
         super().__init__("Semantic error: can not find 'main' function")
@@ -1,4 +1,8 @@
+import sys
+from typing import Optional, TextIO
+
 from frontend.ast.node import Node
+from frontend.ast.traversal import walk
 
 
 class TreePrinter:
@@ -6,50 +10,54 @@ class TreePrinter:
     r = "]"
     lr = l + r
 
-    def __init__(self, indent_len=4) -> None:
+    def __init__(self, indent_len=4, file: Optional[TextIO] = None) -> None:
         self.indent_len = indent_len
         self.indent_num = 0
+        self.file = file
 
     def print(self, element) -> None:
+        # resolved here rather than in `__init__`, so that redirecting stdout in the meantime works
+        self.write = (self.file or sys.stdout).write
+        walk(element, self.enter, self.leave)
+
+    # Print the opening line of an element. Returns whether its children should be printed.
+    def enter(self, element) -> bool:
         if element is None:
             self.print_line("<None: here is a bug>")
 
         elif isinstance(element, Node):
             if element.is_leaf():
                 self.print_line(str(element))
-                return
+                return False
 
             if len(element) == 0:
                 self.print_line(f"{element.name} {self.lr}")
-                return
+                return False
 
             self.print_line(f"{element.name} {self.l}")
             self.inc_indent()
-            for it in element:
-                self.print(it)
-            self.dec_indent()
-            self.print_line(self.r)
+            return True
 
         elif isinstance(element, list):
             self.print_line("List")
             self.inc_indent()
             if len(element) == 0:
                 self.print_line("<empty>")
-            else:
-                for it in element:
-                    self.print(it)
-            self.dec_indent()
+            return True
 
         else:
             self.print_line(str(element))
+        return False
 
-    def output_indent(self) -> None:
-        if self.indent_num > 0:
-            print(" " * self.indent_len * self.indent_num, end="")
+    # Close an element after its children have been printed.
+    def leave(self, element) -> None:
+        self.dec_indent()
+        if isinstance(element, Node):
+            self.print_line(self.r)
 
+    # Write a line with its indent in a single call.
     def print_line(self, s: str) -> None:
-        self.output_indent()
-        print(s)
+        self.write(" " * self.indent_len * self.indent_num + s + "\n")
 
     def inc_indent(self) -> None:
         self.indent_num += 1
@@ -0,0 +1,43 @@
+"""
+Module that maps positions in the source text to lines and columns, for diagnostics.
+
+A `SourceMap` is built once per input, by a single scan for line breaks, and holds the offset of every line start.
+Looking up a position is then a binary search, and retrieving a line is a slice,
+so reporting many errors no longer rescans the whole input for each of them.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from typing import Any
+
+# the line breaks of the lexer (see `t_ignore_Newline`), so that lines agree with the line numbers of tokens
+_NEWLINE = re.compile(r"\r\n?|\n")
+
+
+class SourceMap:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        # offset of the first character of each line
+        self.line_starts = [0]
+        self.line_starts += [m.end() for m in _NEWLINE.finditer(text)]
+
+    @staticmethod
+    def of(lexer: Any) -> SourceMap:
+        "The source map of the current input of a lexer, built on first use."
+        source_map = getattr(lexer, "source_map", None)
+        if source_map is None or source_map.text is not lexer.lexdata:
+            source_map = lexer.source_map = SourceMap(lexer.lexdata)
+        return source_map
+
+    def position(self, pos: int) -> tuple[int, int]:
+        "The line and column of an offset, both starting from 1."
+        lineno = bisect_right(self.line_starts, pos)
+        return lineno, pos - self.line_starts[lineno - 1] + 1
+
+    def line(self, lineno: int) -> str:
+        "The text of a line, without its line break."
+        starts = self.line_starts
+        end = starts[lineno] if lineno < len(starts) else len(self.text)
+        return self.text[starts[lineno - 1] : end].rstrip("\r\n")
@@ -0,0 +1,288 @@
+"""
+A compact binary format of TAC programs, so that TAC can be cached or shipped to the backend
+without running the frontend again (see `--emit-tac-bin` and `--from-tac-bin` in `main.py`).
+
+Layout of a file, where all integers are little-endian:
+    header:     magic b"TACB", u16 version
+    strings:    u32 count, then per string: u32 length, UTF-8 bytes
+    functions:  u32 count, then per function:
+                    u32 name, i32 num_params, i32 temp_used, u32 number of blocks, then per block:
+                        u32 label, u32 number of instructions, then per instruction:
+                            u8 opcode, and the fixed-size operands of the opcode (see `_INSTRS`)
+Names, labels and comments are interned in the string table, and referred to by their indices.
+Temps are referred to by their indices (`_NO_TEMP` for a missing operand), and operators by the values of their enums.
+Any change to the layout, the opcodes or the operator enums must bump `VERSION`.
+"""
+
+import gc
+import struct
+from typing import BinaryIO, Optional, Union
+
+from .instructions import *
+from .program import TACBlock, TACFunc, TACProg
+from .temp import Temp
+
+MAGIC = b"TACB"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sH")
+_U32 = struct.Struct("<I")
+_FUNC = struct.Struct("<IiiI")
+_BLOCK = struct.Struct("<II")
+
+# opcodes
+(
+    _ASSIGN,
+    _LOAD_IMM,
+    _UNARY,
+    _BINARY,
+    _JUMP,
+    _BRANCH,
+    _RETURN,
+    _RETURN_VOID,
+    _CALL,
+    _COMMENT,
+) = range(10)
+
+# opcode and operands of every instruction; a call is followed by the i32 indices of its arguments
+_INSTRS = {
+    _ASSIGN: struct.Struct("<Bii"),  # dst, src
+    _LOAD_IMM: struct.Struct("<Biq"),  # dst, value
+    _UNARY: struct.Struct("<BBii"),  # op, dst, operand
+    _BINARY: struct.Struct("<BBiii"),  # op, dst, lhs, rhs
+    _JUMP: struct.Struct("<BI"),  # target label
+    _BRANCH: struct.Struct("<BiII"),  # cond, false label, true label
+    _RETURN: struct.Struct("<Bi"),  # value
+    _RETURN_VOID: struct.Struct("<B"),
+    _CALL: struct.Struct("<BIiI"),  # callee, dst, number of arguments
+    _COMMENT: struct.Struct("<BI"),  # message
+}
+
+# the index of a missing operand, which the frontend leaves for constructs it doesn't support yet
+_NO_TEMP = -(2**31)
+
+_UNARY_OPS = {op.value: op for op in UnaryOp}
+_BINARY_OPS = {op.value: op for op in BinaryOp}
+
+
+def _index(temp: Optional[Temp]) -> int:
+    return _NO_TEMP if temp is None else temp.index
+
+
+def dumps(prog: TACProg) -> bytes:
+    strings: dict[str, int] = {}
+
+    def intern(s: str) -> int:
+        index = strings.get(s)
+        if index is None:
+            index = strings[s] = len(strings)
+        return index
+
+    ASSIGN, LOAD_IMM, UNARY = _INSTRS[_ASSIGN], _INSTRS[_LOAD_IMM], _INSTRS[_UNARY]
+    BINARY, JUMP, BRANCH = _INSTRS[_BINARY], _INSTRS[_JUMP], _INSTRS[_BRANCH]
+    RETURN, RETURN_VOID = _INSTRS[_RETURN], _INSTRS[_RETURN_VOID]
+
+    body = bytearray(_U32.pack(len(prog.funcs)))
+    for func in prog.funcs:
+        body += _FUNC.pack(
+            intern(func.name), func.num_params, func.temp_used, len(func.blocks)
+        )
+        for block in func.blocks:
+            body += _BLOCK.pack(intern(block.label), len(block.instrs))
+            for instr in block.instrs:
+                kind = type(instr)
+                if kind is Binary:
+                    body += BINARY.pack(
+                        _BINARY,
+                        instr.op.value,
+                        _index(instr.dst),
+                        _index(instr.lhs),
+                        _index(instr.rhs),
+                    )
+                elif kind is LoadImm32:
+                    body += LOAD_IMM.pack(_LOAD_IMM, _index(instr.dst), instr.value)
+                elif kind is Unary:
+                    body += UNARY.pack(
+                        _UNARY, instr.op.value, _index(instr.dst), _index(instr.operand)
+                    )
+                elif kind is Assign:
+                    body += ASSIGN.pack(_ASSIGN, _index(instr.dst), _index(instr.src))
+                elif kind is Jump:
+                    body += JUMP.pack(_JUMP, intern(instr.target.label))
+                elif kind is Branch:
+                    body += BRANCH.pack(
+                        _BRANCH,
+                        _index(instr.cond),
+                        intern(instr.false_target.label),
+                        intern(instr.true_target.label),
+                    )
+                elif kind is Return:
+                    if instr.value is None:
+                        body += RETURN_VOID.pack(_RETURN_VOID)
+                    else:
+                        body += RETURN.pack(_RETURN, _index(instr.value))
+                elif kind is Call:
+                    body += _INSTRS[_CALL].pack(
+                        _CALL, intern(instr.callee), _index(instr.dst), len(instr.args)
+                    )
+                    body += struct.pack(
+                        "<%di" % len(instr.args), *map(_index, instr.args)
+                    )
+                elif kind is Comment:
+                    body += _INSTRS[_COMMENT].pack(_COMMENT, intern(instr.msg))
+                else:
+                    raise ValueError(f"cannot serialize TAC instruction {instr!r}")
+
+    out = bytearray(_HEADER.pack(MAGIC, VERSION))
+    out += _U32.pack(len(strings))
+    for s in strings:
+        encoded = s.encode()
+        out += _U32.pack(len(encoded))
+        out += encoded
+    out += body
+    return bytes(out)
+
+
+def dump(prog: TACProg, file: BinaryIO) -> None:
+    file.write(dumps(prog))
+
+
+def loads(data: Union[bytes, bytearray, memoryview]) -> TACProg:
+    "Decode a TAC program directly from the buffer. Raises `ValueError` if it isn't valid binary TAC."
+    buf = memoryview(data)
+    if len(buf) < _HEADER.size:
+        raise ValueError("not a binary TAC file")
+    magic, version = _HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise ValueError("not a binary TAC file")
+    if version != VERSION:
+        raise ValueError(
+            f"unsupported binary TAC version {version} (expected {VERSION})"
+        )
+
+    # Loading allocates lots of objects and no garbage, so collections in the meantime would be wasted.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _read(buf, _HEADER.size)
+    except (struct.error, IndexError, KeyError) as e:
+        raise ValueError("truncated or corrupted binary TAC") from e
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def load(file: BinaryIO) -> TACProg:
+    return loads(file.read())
+
+
+def _read(buf: memoryview, pos: int) -> TACProg:
+    U32, FUNC, BLOCK = _U32, _FUNC, _BLOCK
+    ASSIGN, LOAD_IMM, UNARY = _INSTRS[_ASSIGN], _INSTRS[_LOAD_IMM], _INSTRS[_UNARY]
+    BINARY, JUMP, BRANCH = _INSTRS[_BINARY], _INSTRS[_JUMP], _INSTRS[_BRANCH]
+    RETURN, RETURN_VOID = _INSTRS[_RETURN], _INSTRS[_RETURN_VOID]
+    CALL, COMMENT = _INSTRS[_CALL], _INSTRS[_COMMENT]
+    unary_ops, binary_ops = _UNARY_OPS, _BINARY_OPS
+
+    (num_strings,) = U32.unpack_from(buf, pos)
+    pos += U32.size
+    strings = []
+    for _ in range(num_strings):
+        (length,) = U32.unpack_from(buf, pos)
+        pos += U32.size
+        if pos + length > len(buf):
+            raise IndexError("string out of range")
+        strings.append(str(buf[pos : pos + length], "utf-8"))
+        pos += length
+
+    (num_funcs,) = U32.unpack_from(buf, pos)
+    pos += U32.size
+    funcs = []
+    for _ in range(num_funcs):
+        name, num_params, temp_used, num_blocks = FUNC.unpack_from(buf, pos)
+        pos += FUNC.size
+
+        # Temps are shared by the instructions of a function, as they are in the output of TACGen.
+        # Blocks are created on their first reference, since jumps may refer to later blocks.
+        temps: dict[int, Optional[Temp]] = {_NO_TEMP: None}
+        blocks_by_label: dict[int, TACBlock] = {}
+
+        def temp(index: int) -> Optional[Temp]:
+            try:
+                return temps[index]
+            except KeyError:
+                # temps with smaller indices are the physical registers of the backend
+                if index < 1:
+                    raise ValueError(f"invalid temp index {index}")
+                t = temps[index] = Temp(index)
+                return t
+
+        def block_of(label: int) -> TACBlock:
+            b = blocks_by_label.get(label)
+            if b is None:
+                b = blocks_by_label[label] = TACBlock(strings[label])
+            return b
+
+        blocks = []
+        for _ in range(num_blocks):
+            label, num_instrs = BLOCK.unpack_from(buf, pos)
+            pos += BLOCK.size
+            block = block_of(label)
+            instrs = block.instrs
+            for _ in range(num_instrs):
+                opcode = buf[pos]
+                if opcode == _BINARY:
+                    _, op, dst, lhs, rhs = BINARY.unpack_from(buf, pos)
+                    pos += BINARY.size
+                    instr = Binary(binary_ops[op], temp(dst), temp(lhs), temp(rhs))
+                elif opcode == _LOAD_IMM:
+                    _, dst, value = LOAD_IMM.unpack_from(buf, pos)
+                    pos += LOAD_IMM.size
+                    instr = LoadImm32(temp(dst), value)
+                elif opcode == _UNARY:
+                    _, op, dst, operand = UNARY.unpack_from(buf, pos)
+                    pos += UNARY.size
+                    instr = Unary(unary_ops[op], temp(dst), temp(operand))
+                elif opcode == _ASSIGN:
+                    _, dst, src = ASSIGN.unpack_from(buf, pos)
+                    pos += ASSIGN.size
+                    instr = Assign(temp(dst), temp(src))
+                elif opcode == _JUMP:
+                    _, target = JUMP.unpack_from(buf, pos)
+                    pos += JUMP.size
+                    instr = Jump(block_of(target))
+                elif opcode == _BRANCH:
+                    _, cond, false_target, true_target = BRANCH.unpack_from(buf, pos)
+                    pos += BRANCH.size
+                    instr = Branch(
+                        temp(cond), block_of(false_target), block_of(true_target)
+                    )
+                elif opcode == _RETURN:
+                    _, value = RETURN.unpack_from(buf, pos)
+                    pos += RETURN.size
+                    instr = Return(temp(value))
+                elif opcode == _RETURN_VOID:
+                    pos += RETURN_VOID.size
+                    instr = Return(None)
+                elif opcode == _CALL:
+                    _, callee, dst, num_args = CALL.unpack_from(buf, pos)
+                    pos += CALL.size
+                    args = struct.unpack_from("<%di" % num_args, buf, pos)
+                    pos += 4 * num_args
+                    instr = Call(strings[callee], temp(dst), [temp(a) for a in args])
+                elif opcode == _COMMENT:
+                    _, msg = COMMENT.unpack_from(buf, pos)
+                    pos += COMMENT.size
+                    instr = Comment(strings[msg])
+                else:
+                    raise ValueError(f"unknown TAC opcode {opcode}")
+                instrs.append(instr)
+            blocks.append(block)
+
+        func = TACFunc(strings[name], num_params, blocks)
+        func.temp_used = temp_used
+        funcs.append(func)
+
+    if pos != len(buf):
+        raise ValueError("trailing data after binary TAC")
+    return TACProg(funcs)
@@ -3,7 +3,7 @@ Instructions of TAC Programs.
 """
 
 from enum import Enum, auto, unique
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Mapping, Optional
 
 from .visitor import TACVisitor
 from .temp import Temp
@@ -39,10 +39,20 @@ class BinaryOp(Enum):
 
 
 class TACInstr:
+    # Instructions have `__slots__`, since functions have lots of them. Every subclass must declare its own.
+    # `live_in`, `live_out` and `reg_map` are set by the liveness analysis and the register allocator.
+    __slots__ = ("dsts", "srcs", "_operands", "live_in", "live_out", "reg_map")
+
+    # Names of the attributes that hold operands, i.e. a Temp, None or a list of Temps.
+    # Every subclass with operands must declare them, so that `rewrite_operands` finds them.
+    operand_fields: tuple[str, ...] = ()
+
     def __init__(self, dsts: list[Temp], srcs: list[Temp]) -> None:
         self.dsts = dsts
         self.srcs = srcs
+        self._operands: Optional[list[Temp]] = None
 
+    # `defs`, `uses` and `operands` return the lists of the instruction itself, which must not be modified.
     def defs(self) -> list[Temp]:
         return self.dsts
 
@@ -50,34 +60,46 @@ class TACInstr:
         return self.srcs
 
     def temps(self) -> list[Temp]:
-        return self.defs() + self.uses()
+        return self.operands()
 
     def operands(self) -> list[Temp]:
-        return self.temps()
+        # built on first use, and again after `rewrite_operands`
+        if self._operands is None:
+            self._operands = self.dsts + self.srcs
+        return self._operands
 
     def accept(self, v: TACVisitor) -> None:
         v.visit_other(self)
 
     def replace_operand(self, old: Temp, new: Temp):
+        self.rewrite_operands({old: new})
+
+    # Replace every operand that is a key of `mapping` by its value, in a single pass over the operands.
+    def rewrite_operands(self, mapping: Mapping[Optional[Temp], Temp]):
+        get = mapping.get
         # 1. common `regs`
-        self.srcs = [new if r == old else r for r in self.srcs]
-        self.dsts = [new if r == old else r for r in self.dsts]
+        self.srcs = [get(r, r) for r in self.srcs]
+        self.dsts = [get(r, r) for r in self.dsts]
+        self._operands = None
         # 2. other properties
-        for prop in dir(self):
-            if prop.startswith("__"):
-                continue
-            val = getattr(self, prop)
-            if isinstance(val, Temp) and val == old:
-                setattr(self, prop, new)
+        for field in self.operand_fields:
+            val = getattr(self, field)
+            if type(val) is list:
+                setattr(self, field, [get(r, r) for r in val])
+            else:
+                setattr(self, field, get(val, val))
 
 
 # Base class for basic block terminating instructions.
 class Terminator(TACInstr):
-    pass
+    __slots__ = ()
 
 
 # Assignment instruction.
 class Assign(TACInstr):
+    __slots__ = ("dst", "src")
+    operand_fields = ("dst", "src")
+
     def __init__(self, dst: Temp, src: Temp) -> None:
         super().__init__([dst], [src])
         self.dst = dst
@@ -92,6 +114,9 @@ class Assign(TACInstr):
 
 # Loading an immediate 32-bit constant.
 class LoadImm32(TACInstr):
+    __slots__ = ("dst", "value")
+    operand_fields = ("dst",)
+
     def __init__(self, dst: Temp, value: int) -> None:
         super().__init__([dst], [])
         self.dst = dst
@@ -106,6 +131,10 @@ class LoadImm32(TACInstr):
 
 # Unary operations.
 class Unary(TACInstr):
+    __slots__ = ("op", "dst", "operand")
+    operand_fields = ("dst", "operand")
+    op_map = {UnaryOp.NEG: "neg", UnaryOp.NOT: "bitnot", UnaryOp.SEQZ: "iszero"}
+
     def __init__(self, op: UnaryOp, dst: Temp, operand: Temp) -> None:
         super().__init__([dst], [operand])
         self.op = op
@@ -113,10 +142,9 @@ class Unary(TACInstr):
         self.operand = operand
 
     def __str__(self) -> str:
-        op_map = {UnaryOp.NEG: "neg", UnaryOp.NOT: "bitnot", UnaryOp.SEQZ: "iszero"}
         return "%s = %s %s" % (
             self.dst,
-            op_map[self.op],
+            self.op_map[self.op],
             self.operand,
         )
 
@@ -126,6 +154,24 @@ class Unary(TACInstr):
 
 # Binary Operations.
 class Binary(TACInstr):
+    __slots__ = ("op", "dst", "lhs", "rhs")
+    operand_fields = ("dst", "lhs", "rhs")
+    op_str = {
+        BinaryOp.ADD: "+",
+        BinaryOp.SUB: "-",
+        BinaryOp.MUL: "*",
+        BinaryOp.DIV: "/",
+        BinaryOp.REM: "%",
+        BinaryOp.EQU: "==",
+        BinaryOp.NEQ: "!=",
+        BinaryOp.SLT: "<",
+        BinaryOp.LEQ: "<=",
+        BinaryOp.SGT: ">",
+        BinaryOp.GEQ: ">=",
+        BinaryOp.AND: "&&",
+        BinaryOp.OR: "||",
+    }
+
     def __init__(self, op: BinaryOp, dst: Temp, lhs: Temp, rhs: Temp) -> None:
         super().__init__([dst], [lhs, rhs])
         self.op = op
@@ -134,22 +180,7 @@ class Binary(TACInstr):
         self.rhs = rhs
 
     def __str__(self) -> str:
-        op_str = {
-            BinaryOp.ADD: "+",
-            BinaryOp.SUB: "-",
-            BinaryOp.MUL: "*",
-            BinaryOp.DIV: "/",
-            BinaryOp.REM: "%",
-            BinaryOp.EQU: "==",
-            BinaryOp.NEQ: "!=",
-            BinaryOp.SLT: "<",
-            BinaryOp.LEQ: "<=",
-            BinaryOp.SGT: ">",
-            BinaryOp.GEQ: ">=",
-            BinaryOp.AND: "&&",
-            BinaryOp.OR: "||",
-        }[self.op]
-        return "%s = (%s %s %s)" % (self.dst, self.lhs, op_str, self.rhs)
+        return "%s = (%s %s %s)" % (self.dst, self.lhs, self.op_str[self.op], self.rhs)
 
     def accept(self, v: TACVisitor) -> None:
         v.visit_binary(self)
@@ -157,6 +188,8 @@ class Binary(TACInstr):
 
 # Jump (branch without condition) instruction.
 class Jump(Terminator):
+    __slots__ = ("target",)
+
     def __init__(self, target: "TACBlock") -> None:
         super().__init__([], [])
         self.target = target
@@ -170,6 +203,9 @@ class Jump(Terminator):
 
 # Branching with conditions.
 class Branch(Terminator):
+    __slots__ = ("cond", "false_target", "true_target")
+    operand_fields = ("cond",)
+
     def __init__(
         self, cond: Temp, false_target: "TACBlock", true_target: "TACBlock"
     ) -> None:
@@ -191,6 +227,9 @@ class Branch(Terminator):
 
 # Return instruction.
 class Return(Terminator):
+    __slots__ = ("value",)
+    operand_fields = ("value",)
+
     def __init__(self, value: Temp | None) -> None:
         if value is None:
             super().__init__([], [])
@@ -207,6 +246,9 @@ class Return(Terminator):
 
 # Function call.
 class Call(TACInstr):
+    __slots__ = ("callee", "dst", "args")
+    operand_fields = ("dst", "args")
+
     def __init__(self, callee: str, dst: Temp, args: list[Temp]):
         super().__init__([dst], args.copy())
         self.callee = callee
@@ -214,11 +256,13 @@ class Call(TACInstr):
         self.args = args.copy()
 
     def __str__(self) -> str:
-        return "%s = %s(%s)" % (self.dst, self.callee, ",".join(self.args))
+        return "%s = %s(%s)" % (self.dst, self.callee, ",".join(map(str, self.args)))
 
 
 # Annotation (used for debugging).
 class Comment(TACInstr):
+    __slots__ = ("msg",)
+
     def __init__(self, msg: str) -> None:
         super().__init__([], [])
         self.msg = msg
@@ -0,0 +1,143 @@
+"""
+A parser of the textual TAC printed by `TACProg.print` (and `--tac`), so that the backend can run
+on `.tac` files directly (see `--from-tac` in `main.py`), without a MiniDecaf source program.
+
+Functions and blocks both start with a line `name:`. Block labels start with a dot, like the ones of `TACGen`,
+and function names can't, so that's how they are told apart. Instructions are indented, one per line:
+    _T1 = _T2                   Assign
+    _T1 = 42                    LoadImm32
+    _T1 = neg _T2               Unary
+    _T1 = (_T2 + _T3)           Binary
+    _T1 = f(_T2,_T3)            Call
+    jump .L1                    Jump
+    br _T1, .L1, .L2            Branch
+    return _T1 / return         Return
+    # ...                       Comment
+Jumps and branches may refer to blocks before or after them; they get the `TACBlock` with the same label.
+A missing operand is printed (and parsed) as `None`.
+"""
+
+import gc
+from typing import Optional
+
+from .instructions import *
+from .program import TACBlock, TACFunc, TACProg
+from .temp import Temp
+
+_UNARY_OPS = {name: op for op, name in Unary.op_map.items()}
+_BINARY_OPS = {name: op for op, name in Binary.op_str.items()}
+
+
+def parse_tac(text: str) -> TACProg:
+    "Parse a TAC program. Raises `ValueError` with the line number of the first error."
+    # Parsing allocates lots of objects and no garbage, so collections in the meantime would be wasted.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _parse(text)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _parse(text: str) -> TACProg:
+    unary_ops, binary_ops = _UNARY_OPS, _BINARY_OPS
+    funcs: list[TACFunc] = []
+    func: Optional[TACFunc] = None
+    block: Optional[TACBlock] = None
+    # per function: temps and blocks by their names, shared by all their references
+    temps: dict[str, Optional[Temp]] = {}
+    blocks: dict[str, TACBlock] = {}
+
+    def temp(word: str) -> Optional[Temp]:
+        try:
+            return temps[word]
+        except KeyError:
+            if not word.startswith("_T"):
+                raise ValueError(f"expected a temp, found {word!r}")
+            index = int(word[2:])
+            # temps with smaller indices are the physical registers of the backend
+            if index < 1:
+                raise ValueError(f"invalid temp {word!r}")
+            t = temps[word] = Temp(index)
+            return t
+
+    def block_of(label: str) -> TACBlock:
+        b = blocks.get(label)
+        if b is None:
+            b = blocks[label] = TACBlock(label)
+        return b
+
+    def finish(func: Optional[TACFunc]) -> None:
+        # so that `new_temp` doesn't return a temp that is already used
+        if func is not None:
+            func.temp_used = max(
+                (t.index for t in temps.values() if t is not None), default=0
+            )
+
+    lineno = 0
+    try:
+        for lineno, line in enumerate(text.split("\n"), 1):
+            if not line or line.isspace():
+                continue
+
+            if line[0] != " ":
+                if line[-1] != ":":
+                    raise ValueError("expected a label or an indented instruction")
+                name = line[:-1]
+                if name[0] == ".":
+                    if func is None:
+                        raise ValueError("block outside of a function")
+                    block = block_of(name)
+                    func.blocks.append(block)
+                else:
+                    finish(func)
+                    func = TACFunc(name)
+                    funcs.append(func)
+                    block = None
+                    temps = {"None": None}
+                    blocks = {}
+                continue
+
+            if block is None:
+                raise ValueError("instruction outside of a block")
+            words = line.split()
+            first = words[0]
+            n = len(words)
+            if first == "#":
+                instr = Comment(line[line.index("#") + 2 :])
+            elif n > 2 and words[1] == "=":
+                dst = temp(first)
+                if n == 3:
+                    src = words[2]
+                    if src[-1] == ")":
+                        callee, _, args = src[:-1].partition("(")
+                        instr = Call(callee, dst, [temp(a) for a in args.split(",") if a])
+                    elif src[0] == "_" or src == "None":
+                        instr = Assign(dst, temp(src))
+                    else:
+                        instr = LoadImm32(dst, int(src))
+                elif n == 4:
+                    instr = Unary(unary_ops[words[2]], dst, temp(words[3]))
+                elif n == 5 and words[2][0] == "(" and words[4][-1] == ")":
+                    lhs, rhs = temp(words[2][1:]), temp(words[4][:-1])
+                    instr = Binary(binary_ops[words[3]], dst, lhs, rhs)
+                else:
+                    raise ValueError("unknown instruction")
+            elif first == "return" and n <= 2:
+                instr = Return(temp(words[1]) if n == 2 else None)
+            elif first == "jump" and n == 2:
+                instr = Jump(block_of(words[1]))
+            elif first == "br" and n == 4 and words[1][-1] == words[2][-1] == ",":
+                cond = temp(words[1][:-1])
+                instr = Branch(cond, block_of(words[2][:-1]), block_of(words[3]))
+            else:
+                raise ValueError("unknown instruction")
+            block.instrs.append(instr)
+    except KeyError as e:
+        raise ValueError(f"line {lineno}: unknown operator {e.args[0]!r}") from e
+    except ValueError as e:
+        raise ValueError(f"line {lineno}: {e}: {line.strip()!r}") from e
+
+    finish(func)
+    return TACProg(funcs)
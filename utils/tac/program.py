@@ -9,6 +9,8 @@ TAC Functions will be translated into assembly sub-routines.
 'Directives' here are also called 'pseudo instructions', which provide extra information of the program,
 such as external variable declaration.
 """
+import sys
+from typing import Optional, TextIO
 
 from .instructions import TACInstr
 from .temp import Temp
@@ -45,10 +47,14 @@ class TACBlock:
         return "Block<%s>" % self.label
 
     def __str__(self) -> str:
-        s = self.label + ":"
-        for instr in self.instrs:
-            s += "\n    " + str(instr)
-        return s
+        lines = [self.label + ":"]
+        lines += ["    " + str(instr) for instr in self.instrs]
+        return "\n".join(lines)
+
+    # Write the block line by line, with a line break after the last line.
+    def write(self, file: TextIO) -> None:
+        file.write(self.label + ":\n")
+        file.writelines("    %s\n" % instr for instr in self.instrs)
 
 
 class TACFunc:
@@ -71,10 +77,13 @@ class TACFunc:
         return "Func<%s>" % self.name
 
     def __str__(self) -> str:
-        s = self.name + ":"
+        return "\n".join([self.name + ":"] + [str(block) for block in self.blocks])
+
+    # Write the function block by block, with a line break after the last line.
+    def write(self, file: TextIO) -> None:
+        file.write(self.name + ":\n")
         for block in self.blocks:
-            s += "\n" + str(block)
-        return s
+            block.write(file)
 
 
 # A TAC program consists of several TAC functions.
@@ -86,6 +95,9 @@ class TACProg:
     def __str__(self) -> str:
         return "\n".join(str(fn) for fn in self.funcs)
 
-    def print(self) -> None:
+    # Write the program function by function to `file` (stdout by default),
+    # so that the text of the whole program is never built in memory.
+    def print(self, file: Optional[TextIO] = None) -> None:
+        file = file or sys.stdout
         for func in self.funcs:
-            print(str(func))
+            func.write(file)
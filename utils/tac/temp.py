@@ -3,11 +3,42 @@ This module contains classes of 'temporary variables', or 'virtual registers'.
 These 'variables'/'registers' serve as operands of TAC instructions/native assembly instructions.
 """
 
+from threading import Lock
+from weakref import WeakValueDictionary
+
 
 # Temporary variables.
+# Temps are interned: `Temp(index)` always returns the same object for the same index, so that passes can
+# create them freely (e.g. `phys_reg`) without allocating, and equality is identity.
+# The hash is still the index, so that iterating over a set of temps is deterministic.
+# Physical registers (index <= 0) are interned for good. Virtual ones are only interned while something refers to
+# them, i.e. while the function they belong to is being compiled, so that a long-running process (the compile daemon)
+# doesn't keep the temps of every function it has compiled.
 class Temp:
-    def __init__(self, index: int) -> None:
-        self.index = index
+    __slots__ = ("index", "__weakref__")
+
+    # physical registers, by index
+    physical: dict[int, "Temp"] = {}
+    # virtual registers in use, by index
+    virtual: "WeakValueDictionary[int, Temp]" = WeakValueDictionary()
+    # keeps a single temp per index, even if threads race to create it
+    lock = Lock()
+
+    def __new__(cls, index: int) -> "Temp":
+        table = cls.physical if index <= 0 else cls.virtual
+        temp = table.get(index)
+        if temp is None:
+            with cls.lock:
+                temp = table.get(index)
+                if temp is None:
+                    temp = super().__new__(cls)
+                    temp.index = index
+                    table[index] = temp
+        return temp
+
+    # unpickled temps (e.g. in backend worker processes) are interned too, in the tables of the unpickling process
+    def __reduce__(self):
+        return (Temp, (self.index,))
 
     def __repr__(self) -> str:
         return "%%%d" % self.index
@@ -16,9 +47,4 @@ class Temp:
         return "_T%d" % self.index
 
     def __hash__(self) -> int:
-        return hash(self.index)
-
-    def __eq__(self, other) -> bool:
-        if not isinstance(other, Temp):
-            return False
-        return self.index == other.index
+        return self.index
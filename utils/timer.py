@@ -0,0 +1,117 @@
+"""
+Per-pass timing and memory statistics, reported by `--time-passes` and `--time-report`.
+
+Every timed region records its wall time, CPU time and the peak of memory traced by `tracemalloc`.
+Regions may nest, e.g. `asm` > `LocalRegAllocator` > `main`.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, Optional, TextIO
+
+
+@dataclass
+class PassRecord:
+    name: str
+    depth: int
+    wall: float = 0.0  # in seconds
+    cpu: float = 0.0  # in seconds
+    peak: int = 0  # in bytes
+    children: list[PassRecord] = field(default_factory=list)
+
+
+class PassTimer:
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.records: list[PassRecord] = []  # top-level records
+        self.stack: list[PassRecord] = []
+        # whether this timer started `tracemalloc`, which it then stops when its outermost region ends
+        self.started_tracing = False
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        # (imported here, since it's only needed when timing is enabled)
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            # Tracing slows down everything, so it mustn't outlive the timed regions (e.g. in the compile daemon).
+            tracemalloc.start()
+            self.started_tracing = True
+
+        parent = self.stack[-1] if self.stack else None
+        record = PassRecord(name, len(self.stack))
+        (parent.children if parent else self.records).append(record)
+
+        # `reset_peak` discards the peak of the enclosing region, so save it first.
+        self._update_peak()
+        tracemalloc.reset_peak()
+        self.stack.append(record)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record.wall = time.perf_counter() - wall
+            record.cpu = time.process_time() - cpu
+            self._update_peak()
+            self.stack.pop()
+            if parent is not None:
+                parent.peak = max(parent.peak, record.peak)
+            tracemalloc.reset_peak()
+            if not self.stack and self.started_tracing:
+                tracemalloc.stop()
+                self.started_tracing = False
+
+    def _update_peak(self) -> None:
+        import tracemalloc
+
+        if self.stack:
+            record = self.stack[-1]
+            record.peak = max(record.peak, tracemalloc.get_traced_memory()[1])
+
+    def walk(self, records: Optional[list[PassRecord]] = None) -> Iterator[PassRecord]:
+        "Iterates all records in pre-order."
+        for record in self.records if records is None else records:
+            yield record
+            yield from self.walk(record.children)
+
+    def print(self, file: Optional[TextIO] = None) -> None:
+        # (resolved here, since `sys.stderr` may be redirected, e.g. by the compile daemon)
+        if file is None:
+            file = sys.stderr
+        total = sum(record.wall for record in self.records) or 1.0
+        print("===== Pass execution timing report =====", file=file)
+        print(
+            "%10s %10s %7s %12s  %s" % ("Wall (s)", "CPU (s)", "Wall %", "Peak (KiB)", "Name"),
+            file=file,
+        )
+        for record in self.walk():
+            print(
+                "%10.4f %10.4f %6.1f%% %12.1f  %s%s"
+                % (
+                    record.wall,
+                    record.cpu,
+                    record.wall / total * 100,
+                    record.peak / 1024,
+                    "  " * record.depth,
+                    record.name,
+                ),
+                file=file,
+            )
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump([asdict(record) for record in self.records], f, indent=2)
+
+
+# A timer that records nothing.
+NULL_TIMER = PassTimer(enabled=False)